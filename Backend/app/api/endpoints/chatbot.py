@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, Header, HTTPException
+import json
+import logging
+import anyio
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from app.schemas.chat_schema import ChatRequest, QueryResponse, ChatHistoryResponse
-from app.services.rag import answer as rag
-from app.services.db import get_db
+from app.services.rag import answer as rag, answer_stream as rag_stream
+from app.services.db import get_db, async_session
 from app.utils.security import decode_access_token
 from app.services.session import (
     get_or_create_active_session,
@@ -11,13 +15,18 @@ from app.services.session import (
     delete_active_session,
     persist_message,
     fetch_history,
+    fetch_chat_context,
+    compact_session,
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/chat", tags=["Assistant"])
 
 @router.post("/", response_model=QueryResponse)
 async def assistant(
     request: ChatRequest,
+    background_tasks: BackgroundTasks,
     authorization: Optional[str] | None = Header(default=None),
     db: AsyncSession = Depends(get_db),
 ):
@@ -37,13 +46,78 @@ async def assistant(
 
     session = await get_or_create_active_session(db, user_id)
     await persist_message(db, session.id, "user", request.message, voice_transcript=request.voice_transcript)
-    history_items = await fetch_history(db, user_id)
-    answer, sources = await rag(request.message, request.top_k, chat_history=history_items)
+    conversation_summary, history_items = await fetch_chat_context(db, session.id)
+    answer, sources = await rag(request.message, request.top_k, chat_history=history_items, conversation_summary=conversation_summary)
     await persist_message(db, session.id, "assistant", answer)
+    background_tasks.add_task(compact_session, session.id)
 
     return QueryResponse(answer=answer, session_id=session.id)
 
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/stream")
+async def assistant_stream(
+    request: ChatRequest,
+    background_tasks: BackgroundTasks,
+    authorization: Optional[str] | None = Header(default=None),
+    db: AsyncSession = Depends(get_db),
+):
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Missing Authorization header")
+    token = authorization.replace("Bearer ", "").strip()
+    payload = decode_access_token(token)
+    user_id = int(payload.get("sub"))
+
+    if request.message.strip().lower() == "terminate my session":
+        new_session_id = await terminate_active_session(db, user_id)
+
+        async def terminated():
+            yield _sse("done", {
+                "answer": "Session terminated. Refresh the Page",
+                "session_id": new_session_id,
+                "terminated": True,
+            })
+
+        return StreamingResponse(terminated(), media_type="text/event-stream")
+
+    session = await get_or_create_active_session(db, user_id)
+    session_id = session.id
+    await persist_message(db, session_id, "user", request.message, voice_transcript=request.voice_transcript)
+    conversation_summary, history_items = await fetch_chat_context(db, session_id)
+
+    async def events():
+        parts: list[str] = []
+        failed = False
+        try:
+            async for delta in rag_stream(request.message, request.top_k, chat_history=history_items, conversation_summary=conversation_summary):
+                parts.append(delta)
+                yield _sse("token", {"delta": delta})
+        except Exception:
+            # A reply cut off by a model error is not worth keeping in the history.
+            logger.exception("Streaming answer failed for session %s", session_id)
+            failed = True
+            yield _sse("error", {"detail": "Failed to generate a response", "session_id": session_id})
+        else:
+            yield _sse("done", {"answer": "".join(parts), "session_id": session_id})
+        finally:
+            answer = "".join(parts)
+            if answer and not failed:
+                with anyio.CancelScope(shield=True):
+                    async with async_session() as stream_db:
+                        await persist_message(stream_db, session_id, "assistant", answer)
+
+    background_tasks.add_task(compact_session, session_id)
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=background_tasks,
+    )
+
+
 @router.get("/history", response_model=ChatHistoryResponse)
 async def history(
     authorization: Optional[str] | None = Header(default=None),
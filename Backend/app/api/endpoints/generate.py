@@ -7,6 +7,7 @@ from app.utils.security import decode_access_token
 from app.services.session import get_or_create_active_session
 from app.services.generator import generate_tax_return_pdf, generate_tax_return_pdf_with_overrides
 from app.schemas.gen_schema import GenerateTaxReturnRequest
+from app.utils.tax_policy import UnknownTaxYear
 
 router = APIRouter(prefix="/generate", tags=["Generator"])
 
@@ -27,7 +28,10 @@ async def generate_tax_return(
 
     session = await get_or_create_active_session(db, user_id)
 
-    pdf_bytes, filename = await generate_tax_return_pdf(db, user_id=user_id, session_id=session.id)
+    try:
+        pdf_bytes, filename = await generate_tax_return_pdf(db, user_id=user_id, session_id=session.id)
+    except UnknownTaxYear as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
     return StreamingResponse(
         iter([pdf_bytes]),
@@ -57,12 +61,15 @@ async def generate_tax_return_from_form(
     session = await get_or_create_active_session(db, user_id)
     overrides = payload.model_dump(exclude_unset=True)
 
-    pdf_bytes, filename = await generate_tax_return_pdf_with_overrides(
-        db,
-        user_id=user_id,
-        session_id=session.id,
-        overrides=overrides,
-    )
+    try:
+        pdf_bytes, filename = await generate_tax_return_pdf_with_overrides(
+            db,
+            user_id=user_id,
+            session_id=session.id,
+            overrides=overrides,
+        )
+    except UnknownTaxYear as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
     return StreamingResponse(
         iter([pdf_bytes]),
@@ -6,10 +6,13 @@ from app.schemas.voice_schema import TranscribeResponse
 from app.services.db import get_db
 from app.utils.security import decode_access_token
 from app.services.speech import transcribe_audio_bytes, UnsupportedSpokenLanguageError
+from app.utils.uploads import read_upload, UploadTooLarge
 
 
 router = APIRouter(prefix="/speech", tags=["Speech"])
 
+MAX_AUDIO_BYTES = 25 * 1024 * 1024
+
 
 @router.post("/transcribe", response_model=TranscribeResponse)
 async def transcribe(
@@ -22,11 +25,16 @@ async def transcribe(
     token = authorization.replace("Bearer ", "").strip()
     _ = decode_access_token(token)
 
-    content = await audio.read()
+    try:
+        upload = await read_upload(audio, max_bytes=MAX_AUDIO_BYTES)
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail="Audio too large")
+    try:
+        content = upload.read_bytes()
+    finally:
+        upload.close()
     if not content:
         raise HTTPException(status_code=400, detail="Empty audio")
-    if len(content) > 25 * 1024 * 1024:
-        raise HTTPException(status_code=413, detail="Audio too large")
 
     try:
         text, language = await transcribe_audio_bytes(content, filename=audio.filename)
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.services.db import get_db
+from app.utils.security import decode_access_token
+from app.services.session import get_or_create_active_session
+from app.services.tax_context import get_tax_return_context
+from app.utils.tax_optimizer import optimize_investments
+from app.utils.tax_policy import UnknownTaxYear
+from app.schemas.optimize_schema import InvestmentOptimizeRequest
+
+router = APIRouter(prefix="/tax", tags=["Tax"])
+
+@router.post("/optimize-investment")
+async def optimize_investment(
+    payload: InvestmentOptimizeRequest,
+    authorization: Optional[str] | None = Header(default=None),
+    db: AsyncSession = Depends(get_db),
+):
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Missing Authorization header")
+
+    try:
+        token = authorization.replace("Bearer ", "").strip()
+        user_payload = decode_access_token(token)
+        user_id = int(user_payload.get("sub"))
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid Authorization token")
+
+    session = await get_or_create_active_session(db, user_id)
+    overrides = {"tax_fy": payload.tax_fy} if payload.tax_fy else None
+
+    try:
+        context = await get_tax_return_context(
+            db=db, user_id=user_id, session_id=session.id, overrides=overrides, allow_llm=False
+        )
+        plan = optimize_investments(
+            context,
+            step=payload.step,
+            max_extra={
+                "inv_life": payload.max_extra_life,
+                "inv_dps": payload.max_extra_dps,
+                "inv_sanchay": payload.max_extra_sanchay,
+            },
+        )
+    except UnknownTaxYear as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    return {
+        "tax_fy": context["tax_fy"],
+        "taxpayer_category": context["taxpayer_category"],
+        "total_income": context["total_income"],
+        **plan,
+    }
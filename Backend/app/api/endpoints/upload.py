@@ -1,34 +1,29 @@
+import asyncio
+import json
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Header
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import Optional
-from app.services.db import get_db
+from app.services.db import get_db, async_session
+from app.services import blobstore, doc_cache, jobs
 from app.utils.security import decode_access_token
 from app.model.model import (
     UploadedDocument,
+    UploadJob,
     User,
-    NidInfo,
-    TinInfo,
-    SalaryInfo,
-    BankInfo,
-    InsuranceInfo,
-    DpsInfo,
-    SanchaypatraInfo,
-    LoanInfo,
-)
-from app.services.session import get_or_create_active_session, persist_message
-from app.utils.information import persist_structured_info
-from app.utils.parsing import extract_text
-from app.services.summary import (
-    summarize,
-    identify_document_type,
-    extract_structured_data,
-    DocType,
 )
+from app.services.session import get_or_create_active_session
+from app.services.tax_snapshot import load_session_snapshot
+from app.utils.uploads import read_upload, UploadTooLarge
 
 router = APIRouter(prefix="/upload", tags=["Upload Documents"])
 
+MAX_UPLOAD_BYTES = 5 * 1024 * 1024
+
+# Upper bound between status reads when no in-process change notification arrives.
+JOB_POLL_SECONDS = 5.0
+
 
 def _is_profile_complete(user: User) -> bool:
     if user.date_of_birth is None:
@@ -66,77 +61,128 @@ async def upload_document(
         )
 
 
-    content = await file.read()
-    if len(content) > 5 * 1024 * 1024:
+    try:
+        upload = await read_upload(file, max_bytes=MAX_UPLOAD_BYTES)
+    except UploadTooLarge:
         raise HTTPException(status_code=400, detail="File too large. Max 5 MB")
 
-    existing = await db.execute(
-        select(UploadedDocument).where(UploadedDocument.session_id == session.id)
-    )
-    docs = existing.scalars().all()
-    if len(docs) >= 10:
-        raise HTTPException(status_code=400, detail="Upload limit reached")
-
-    extracted_text = ""
-    doc_type: DocType = DocType.UNKNOWN
     try:
-        extracted_text = await extract_text(
-            filename=file.filename,
-            mime_type=file.content_type,
-            content=content,
+        existing = await db.execute(
+            select(UploadedDocument).where(UploadedDocument.session_id == session.id)
         )
-        doc_type = await identify_document_type(extracted_text)
-    except Exception:
-        extracted_text = ""
-        doc_type = DocType.UNKNOWN
+        docs = existing.scalars().all()
+        if len(docs) >= 10:
+            raise HTTPException(status_code=400, detail="Upload limit reached")
+
+        content_hash = await blobstore.put_chunks(upload.iter_chunks(), upload.sha256)
+    finally:
+        upload.close()
 
     doc = UploadedDocument(
         session_id=session.id,
         filename=file.filename,
         mime_type=file.content_type or "application/octet-stream",
-        size=len(content),
-        content=content,
+        size=upload.size,
+        content_hash=content_hash,
     )
     db.add(doc)
+    await db.flush()
+    job = UploadJob(user_id=user_id, session_id=session.id, document_id=doc.id)
+    db.add(job)
     await db.commit()
-    await db.refresh(doc)
 
-    summary = None
-    try:
-        if doc_type != DocType.UNKNOWN:
-            structured = await extract_structured_data(extracted_text, doc_type)
-            if structured:
-                await persist_structured_info(
-                    db,
-                    session_id=session.id,
-                    user_id=user_id,
-                    doc_type=doc_type,
-                    data=structured,
-                )
-
-        summary = await summarize(filename=file.filename or "document", text=extracted_text)
-        if doc_type == DocType.UNKNOWN and not summary:
-            summary = "Provide a concise summary with bullet points.\n- Summary within 4-5 sentences maximum\n"
-        
-        if summary:
-            await persist_message(
-                db,
-                session.id,
-                "assistant",
-                f"Summary: {file.filename}\n{summary}",
-            )
-    except Exception:
-        summary = None
-    return JSONResponse({
+    # A byte-identical document seen before needs no OCR or LLM work.
+    cached = await doc_cache.get(db, doc.content_hash)
+    if cached is not None:
+        job = await jobs.complete_from_cache(db, job, file.filename, cached)
+        return JSONResponse({"filename": file.filename, **jobs.job_dict(job)})
+
+    await jobs.enqueue(job.id)
+    return JSONResponse(status_code=202, content={
         "filename": file.filename,
-        "status": "uploaded",
+        "status": "queued",
         "session_id": session.id,
         "document_id": doc.id,
-        "summary": summary,
-        "doc_type": doc_type.value,
+        "job_id": job.id,
     })
 
 
+def _user_id(authorization: Optional[str]) -> int:
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Missing Authorization header")
+    try:
+        token = authorization.replace("Bearer ", "").strip()
+        payload = decode_access_token(token)
+        return int(payload.get("sub"))
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid Authorization token")
+
+
+async def _get_job(db: AsyncSession, job_id: str, user_id: int) -> UploadJob:
+    result = await db.execute(
+        select(UploadJob).where(UploadJob.id == job_id, UploadJob.user_id == user_id)
+    )
+    job = result.scalar_one_or_none()
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}")
+async def upload_job_status(
+    job_id: str,
+    authorization: Optional[str] | None = Header(default=None),
+    db: AsyncSession = Depends(get_db),
+):
+    job = await _get_job(db, job_id, _user_id(authorization))
+    return JSONResponse(jobs.job_dict(job))
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.get("/jobs/{job_id}/events")
+async def upload_job_events(
+    job_id: str,
+    authorization: Optional[str] | None = Header(default=None),
+    db: AsyncSession = Depends(get_db),
+):
+    user_id = _user_id(authorization)
+    await _get_job(db, job_id, user_id)
+
+    async def event_stream():
+        last = None
+        jobs.watch(job_id)
+        try:
+            while True:
+                changed = jobs.changed_event(job_id)
+                async with async_session() as poll_db:
+                    job = await poll_db.get(UploadJob, job_id)
+                    if job is None:
+                        yield _sse("error", {"detail": "Job not found"})
+                        return
+                    data = jobs.job_dict(job)
+                if (data["status"], data["stage"]) != last:
+                    last = (data["status"], data["stage"])
+                    if data["status"] in jobs.FINISHED:
+                        yield _sse("done", data)
+                        return
+                    yield _sse("progress", data)
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            jobs.unwatch(job_id)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/status")
 async def get_upload_status(
     authorization: Optional[str] | None = Header(default=None),
@@ -155,21 +201,5 @@ async def get_upload_status(
 
     session = await get_or_create_active_session(db, user_id)
 
-    async def _has_rows(model_cls) -> bool:
-        result = await db.execute(
-            select(model_cls.id).where(model_cls.session_id == session.id).limit(1)
-        )
-        return result.scalar_one_or_none() is not None
-
-    statuses = {
-        "nid": await _has_rows(NidInfo),
-        "tin": await _has_rows(TinInfo),
-        "salary": await _has_rows(SalaryInfo),
-        "bank": await _has_rows(BankInfo),
-        "insurance": await _has_rows(InsuranceInfo),
-        "dps": await _has_rows(DpsInfo),
-        "sanchaypatra": await _has_rows(SanchaypatraInfo),
-        "loan": await _has_rows(LoanInfo),
-    }
-
-    return JSONResponse(statuses)
\ No newline at end of file
+    snapshot = await load_session_snapshot(db, user_id, session.id)
+    return JSONResponse(snapshot.present())
\ No newline at end of file
@@ -6,6 +6,7 @@ from app.services.db import get_db
 from app.utils.security import decode_access_token
 from app.model.model import User
 from app.schemas.auth_schema import UserRead, ProfileUpdateRequest
+from app.services.tax_context import tax_context_cache
 
 router = APIRouter(prefix="/user", tags=["User"])
 
@@ -96,5 +97,6 @@ async def update_profile(
 
     db.add(user)
     await db.commit()
+    tax_context_cache.bump_user(user_id)
     await db.refresh(user)
     return user
\ No newline at end of file
@@ -3,10 +3,17 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def _storage_dir() -> str:
+    url = DATABASE_URL or ""
+    if url.startswith("sqlite") and ":///" in url:
+        return os.path.dirname(os.path.abspath(url.split(":///", 1)[1]))
+    return os.getcwd()
+
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(720)
 DATABASE_URL = os.getenv("DATABASE_URL")
+STORAGE_DIR = os.getenv("STORAGE_DIR") or _storage_dir()
 SMTP_SERVER = "smtp.gmail.com"
 SMTP_PORT = "587"
 SMTP_USERNAME = os.getenv("SMTP_USERNAME")
@@ -14,7 +21,44 @@ SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
 SENDER_EMAIL = os.getenv("SENDER_EMAIL")
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 PINECONE_INDEX = "tax-index"
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone").strip().lower()
+VECTOR_INDEX_DIR = os.path.join(STORAGE_DIR, "vector_index")
+VECTOR_IVF_LISTS = int(os.getenv("VECTOR_IVF_LISTS", "0"))
+VECTOR_IVF_PROBES = int(os.getenv("VECTOR_IVF_PROBES", "8"))
+LEXICAL_INDEX_DIR = os.path.join(STORAGE_DIR, "lexical_index")
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR") or os.path.join(STORAGE_DIR, "blobs")
+BLOB_STORE_CONFIGURED = bool(os.getenv("BLOB_STORE_DIR"))
+BLOB_RELEASE_GRACE = float(os.getenv("BLOB_RELEASE_GRACE", "600"))
+INGEST_MANIFEST_PATH = os.path.join(STORAGE_DIR, "ingest_manifest.json")
+LEXICAL_MIN_SCORE = float(os.getenv("LEXICAL_MIN_SCORE", "5.0"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "500"))
+PDF_TIMEOUT = float(os.getenv("PDF_TIMEOUT", "60"))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+OCR_IMAGE_MAX_EDGE = int(os.getenv("OCR_IMAGE_MAX_EDGE", "2000"))
+OCR_IMAGE_QUALITY = int(os.getenv("OCR_IMAGE_QUALITY", "80"))
+OCR_CONCURRENCY = int(os.getenv("OCR_CONCURRENCY", "4"))
+OCR_MAX_PAGES = int(os.getenv("OCR_MAX_PAGES", "20"))
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "2"))
+DOC_RULE_THRESHOLD = float(os.getenv("DOC_RULE_THRESHOLD", "0.75"))
+DOC_RULE_AUDIT_RATE = float(os.getenv("DOC_RULE_AUDIT_RATE", "0.05"))
+DOC_CACHE_TTL_DAYS = int(os.getenv("DOC_CACHE_TTL_DAYS", "30"))
+DOC_CACHE_MAX_BYTES = int(os.getenv("DOC_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+TAX_POLICY_DIR = os.getenv("TAX_POLICY_DIR") or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "tax_policies")
+TAX_DEFAULT_FY = os.getenv("TAX_DEFAULT_FY", "2024_25")
+TAX_CONTEXT_CACHE_MAX_ITEMS = int(os.getenv("TAX_CONTEXT_CACHE_MAX_ITEMS", "256"))
+TAX_CONTEXT_CACHE_TTL = float(os.getenv("TAX_CONTEXT_CACHE_TTL", str(24 * 60 * 60)))
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 MODEL_NAME = "text-embedding-3-small"
+EMBEDDING_DIM = 1536
+EMBEDDING_CACHE_PATH = os.path.join(STORAGE_DIR, "embedding_cache.db")
+EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
 GPT_MODEL = "gpt-5.2"
-STT_MODEL = "whisper-1"
\ No newline at end of file
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+CHAT_COMPACT_AFTER = int(os.getenv("CHAT_COMPACT_AFTER", "20"))
+CHAT_RECENT_WINDOW = int(os.getenv("CHAT_RECENT_WINDOW", "8"))
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", str(24 * 60 * 60)))
+ANSWER_CACHE_MAX_ITEMS = int(os.getenv("ANSWER_CACHE_MAX_ITEMS", "1000"))
+STT_MODEL = "whisper-1"
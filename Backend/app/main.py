@@ -2,22 +2,48 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import traceback
+from app.utils.uploads import BodySizeLimitMiddleware, MULTIPART_OVERHEAD
 from app.model.model import Base
 from app.api.endpoints.auth import router as auth_router
 from app.api.endpoints.chatbot import router as chat_router
-from app.api.endpoints.upload import router as upload_router
+from app.api.endpoints.upload import router as upload_router, MAX_UPLOAD_BYTES
 from app.api.endpoints.user import router as user_router
 from app.api.endpoints.generate import router as generate_router
-from app.api.endpoints.speech import router as speech_router
+from app.api.endpoints.speech import router as speech_router, MAX_AUDIO_BYTES
+from app.api.endpoints.tax import router as tax_router
 
 app = FastAPI(root_path="/api", title="AI Tax & Law Assistant")
 
 @app.on_event("startup")
 async def on_startup():
     from app.services.db import engine
+    from app.services.blobstore import prepare_schema
+    from app.utils import tax_policy
+    tax_policy.load()
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(prepare_schema)
+    from app.services import blobstore, jobs
+    await jobs.start()
+    blobstore.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    from app.services import blobstore, images, jobs, pdf
+    await jobs.stop()
+    await blobstore.stop()
+    pdf.shutdown()
+    images.shutdown()
 
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={
+        "/upload/": (MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD, 400, "File too large. Max 5 MB"),
+        "/speech/transcribe": (MAX_AUDIO_BYTES + MULTIPART_OVERHEAD, 413, "Audio too large"),
+    },
+)
+
+# Added last so it wraps the size limit and early rejections still carry CORS headers.
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -39,11 +65,27 @@ app.include_router(upload_router)
 app.include_router(user_router)
 app.include_router(generate_router)
 app.include_router(speech_router)
+app.include_router(tax_router)
 
 @app.get("/")
 async def root():
     return {"message": "AI Tax & Law Assistant is Running!"}
 
+@app.get("/metrics")
+async def metrics():
+    from app.services.answer_cache import answer_cache
+    from app.utils.embedding import cache_stats
+    from app.utils.doc_rules import agreement
+    from app.services import images
+    from app.services.tax_context import tax_context_cache
+    return {
+        "answer_cache": answer_cache.stats(),
+        "embedding_cache": cache_stats(),
+        "doc_classifier": agreement.stats(),
+        "ocr_images": images.stats(),
+        "tax_context": tax_context_cache.stats(),
+    }
+
 @app.exception_handler(Exception)
 async def unhandled_exception_handler(request: Request, exc: Exception):
     tb = traceback.format_exc()
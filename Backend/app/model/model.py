@@ -1,4 +1,4 @@
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import declarative_base, deferred
 from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, LargeBinary, DateTime, Date, Float
 from sqlalchemy.sql import func
 import uuid
@@ -16,7 +16,9 @@ class GeneratedFile(Base):
     session_id = Column(String, nullable=True, index=True)
     mime_type = Column(String, nullable=True)
     size = Column(Integer, nullable=True)
-    content = Column(LargeBinary, nullable=True)
+    content_hash = Column(String(64), nullable=True, index=True)
+    # Pre-blob-store bytes; emptied by `python -m app.services.blobstore migrate`, dropped in a later release.
+    content = deferred(Column(LargeBinary, nullable=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
@@ -54,6 +56,14 @@ class ChatMessage(Base):
     voice_transcript = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+class ChatSummary(Base):
+    __tablename__ = "14. ChatSummary"
+
+    session_id = Column(String, ForeignKey("11. Sessions.id", ondelete="CASCADE"), primary_key=True)
+    summary = Column(String, nullable=False)
+    last_message_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
+
 class UploadedDocument(Base):
     __tablename__ = "13. Documents"
 
@@ -62,9 +72,38 @@ class UploadedDocument(Base):
     filename = Column(String, nullable=False)
     mime_type = Column(String, nullable=True)
     size = Column(Integer, nullable=True)
-    content = Column(LargeBinary, nullable=False)
+    content_hash = Column(String(64), nullable=False, index=True)
+    # Older databases declare this NOT NULL, so new rows write an empty placeholder.
+    content = deferred(Column(LargeBinary, nullable=True, default=b""))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+class UploadJob(Base):
+    __tablename__ = "15. UploadJobs"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(Integer, ForeignKey("10. User.id", ondelete="CASCADE"), index=True, nullable=False)
+    session_id = Column(String, ForeignKey("11. Sessions.id", ondelete="CASCADE"), index=True, nullable=False)
+    document_id = Column(Integer, ForeignKey("13. Documents.id", ondelete="CASCADE"), nullable=False)
+    status = Column(String(20), default="queued", index=True, nullable=False)
+    stage = Column(String(20), default="queued", nullable=False)
+    doc_type = Column(String(20), nullable=True)
+    summary = Column(String, nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
+
+class DocumentCache(Base):
+    __tablename__ = "16. DocumentCache"
+
+    content_hash = Column(String(64), primary_key=True)
+    text = Column(String, nullable=False, default="")
+    doc_type = Column(String(20), nullable=False)
+    data = Column(String, nullable=True)
+    summary = Column(String, nullable=True)
+    size = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    last_used_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
 class NidInfo(Base):
     __tablename__ = "21. NidInfo"
 
@@ -0,0 +1,12 @@
+from __future__ import annotations
+from typing import Optional
+from pydantic import BaseModel, Field
+
+class InvestmentOptimizeRequest(BaseModel):
+    step: float = Field(default=10000.0, gt=0, description="Grid spacing in BDT")
+    max_extra_life: Optional[float] = Field(default=None, ge=0)
+    max_extra_dps: Optional[float] = Field(default=None, ge=0)
+    max_extra_sanchay: Optional[float] = Field(default=None, ge=0)
+    tax_fy: Optional[str] = Field(default=None, description="e.g. 2024-25")
+
+__all__ = ["InvestmentOptimizeRequest"]
@@ -0,0 +1,95 @@
+from __future__ import annotations
+import itertools
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_TTL, ANSWER_CACHE_MAX_ITEMS
+from app.utils.cache import LRUCache
+
+
+@dataclass
+class CachedAnswer:
+    embedding: np.ndarray
+    answer: str
+    sources: List[dict]
+    latency: float
+
+
+class SemanticAnswerCache:
+    def __init__(self, *, threshold: float, ttl: float, max_items: int):
+        self.threshold = threshold
+        self._entries = LRUCache(max_items=max_items, ttl=ttl)
+        self._seq = itertools.count()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.saved_latency = 0.0
+
+    @staticmethod
+    def _scope(lang: str, source_ids: Sequence[str]) -> Tuple[str, Tuple[str, ...]]:
+        return lang, tuple(sorted(str(s) for s in source_ids))
+
+    @staticmethod
+    def _unit(embedding: Sequence[float]) -> np.ndarray:
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm > 0 else vec
+
+    def lookup(self, embedding: Sequence[float], *, lang: str, source_ids: Sequence[str]) -> Optional[CachedAnswer]:
+        scope = self._scope(lang, source_ids)
+        candidates = [(key, entry) for key, entry in self._entries.items() if key[0] == scope]
+        if candidates:
+            query = self._unit(embedding)
+            scores = np.stack([entry.embedding for _, entry in candidates]) @ query
+            best = int(np.argmax(scores))
+            if float(scores[best]) >= self.threshold:
+                key, entry = candidates[best]
+                self._entries.get(key)
+                self.hits += 1
+                self.saved_latency += entry.latency
+                return entry
+        self.misses += 1
+        return None
+
+    def store(
+        self,
+        embedding: Sequence[float],
+        *,
+        lang: str,
+        source_ids: Sequence[str],
+        answer: str,
+        sources: List[dict],
+        latency: float,
+    ) -> None:
+        if not answer:
+            return
+        key = (self._scope(lang, source_ids), next(self._seq))
+        self._entries.set(key, CachedAnswer(
+            embedding=self._unit(embedding),
+            answer=answer,
+            sources=sources,
+            latency=latency,
+        ))
+
+    def record_bypass(self) -> None:
+        self.bypassed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "saved_latency_seconds": round(self.saved_latency, 3),
+        }
+
+
+answer_cache = SemanticAnswerCache(
+    threshold=ANSWER_CACHE_THRESHOLD,
+    ttl=ANSWER_CACHE_TTL,
+    max_items=ANSWER_CACHE_MAX_ITEMS,
+)
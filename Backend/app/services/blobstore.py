@@ -0,0 +1,338 @@
+from __future__ import annotations
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+from sqlalchemy import inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import BLOB_RELEASE_GRACE, BLOB_STORE_CONFIGURED, BLOB_STORE_DIR
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class BlobStore(ABC):
+    @abstractmethod
+    def put_stream(self, chunks: Iterable[bytes]) -> Tuple[str, int]:
+        ...
+
+    @abstractmethod
+    def open(self, digest: str) -> BinaryIO:
+        ...
+
+    @abstractmethod
+    def exists(self, digest: str) -> bool:
+        ...
+
+    @abstractmethod
+    def touch(self, digest: str) -> bool:
+        ...
+
+    @abstractmethod
+    def delete(self, digest: str) -> None:
+        ...
+
+    @abstractmethod
+    def delete_if_idle(self, digest: str, before: float) -> bool:
+        ...
+
+    def put(self, data: bytes) -> str:
+        digest, _ = self.put_stream([data])
+        return digest
+
+    def read(self, digest: str) -> bytes:
+        with self.open(digest) as f:
+            return f.read()
+
+    def iter_chunks(self, digest: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        with self.open(digest) as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+
+class LocalBlobStore(BlobStore):
+    def __init__(self, root: str):
+        self.root = root
+        # Orders "reuse an existing blob" against "delete an idle blob" for the same file.
+        self._lock = threading.Lock()
+
+    def _path(self, digest: str) -> str:
+        if len(digest) != 64 or not all(c in "0123456789abcdef" for c in digest):
+            raise ValueError(f"Invalid blob digest: {digest!r}")
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def put_stream(self, chunks: Iterable[bytes]) -> Tuple[str, int]:
+        os.makedirs(self.root, exist_ok=True)
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".incoming-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    hasher.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            digest = hasher.hexdigest()
+            path = self._path(digest)
+            with self._lock:
+                if os.path.exists(path):
+                    os.utime(path)
+                    os.remove(tmp)
+                else:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(tmp, path)
+            return digest, size
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def open(self, digest: str) -> BinaryIO:
+        return open(self._path(digest), "rb")
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self._path(digest))
+
+    def touch(self, digest: str) -> bool:
+        path = self._path(digest)
+        with self._lock:
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                return False
+            return True
+
+    def delete(self, digest: str) -> None:
+        try:
+            os.remove(self._path(digest))
+        except FileNotFoundError:
+            pass
+
+    def delete_if_idle(self, digest: str, before: float) -> bool:
+        path = self._path(digest)
+        with self._lock:
+            try:
+                if os.stat(path).st_mtime >= before:
+                    return False
+                os.remove(path)
+            except FileNotFoundError:
+                return False
+            return True
+
+
+_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    global _store
+    if _store is None:
+        _store = LocalBlobStore(BLOB_STORE_DIR)
+    return _store
+
+
+async def put(data: bytes) -> str:
+    return await asyncio.to_thread(get_blob_store().put, data)
+
+
+async def put_chunks(chunks: Iterable[bytes], digest: Optional[str] = None) -> str:
+    store = get_blob_store()
+    if digest and await asyncio.to_thread(store.touch, digest):
+        return digest
+    stored, _ = await asyncio.to_thread(store.put_stream, chunks)
+    return stored
+
+
+async def read(digest: str) -> bytes:
+    return await asyncio.to_thread(get_blob_store().read, digest)
+
+
+# Digests that may have lost their last reference, with the time they were released.
+_pending: Dict[str, float] = {}
+
+
+async def _referenced(db: AsyncSession, digest: str) -> bool:
+    from app.model.model import GeneratedFile, UploadedDocument
+
+    for model_cls in (UploadedDocument, GeneratedFile):
+        result = await db.execute(
+            select(model_cls.id).where(model_cls.content_hash == digest).limit(1)
+        )
+        if result.scalar_one_or_none() is not None:
+            return True
+    return False
+
+
+async def release(db: AsyncSession, digests: Sequence[str]) -> None:
+    # Deletion is deferred: an identical upload may already be reusing the file and not yet
+    # have committed its row. sweep() re-checks references once the grace period has passed.
+    now = time.time()
+    for digest in set(d for d in digests if d):
+        _pending[digest] = now
+    await sweep(db)
+
+
+async def sweep(db: AsyncSession, grace: float = BLOB_RELEASE_GRACE) -> int:
+    store = get_blob_store()
+    cutoff = time.time() - grace
+    deleted = 0
+    for digest in [d for d, released_at in _pending.items() if released_at <= cutoff]:
+        _pending.pop(digest, None)
+        if await _referenced(db, digest):
+            continue
+        # A put that reused the file inside the grace period bumped its mtime.
+        if await asyncio.to_thread(store.delete_if_idle, digest, cutoff):
+            deleted += 1
+    return deleted
+
+
+async def _sweeper(interval: float) -> None:
+    from app.services.db import async_session
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with async_session() as db:
+                await sweep(db)
+        except Exception:
+            logger.exception("Blob sweep failed")
+
+
+_sweeper_task: Optional[asyncio.Task] = None
+
+
+def start(interval: float = BLOB_RELEASE_GRACE) -> None:
+    global _sweeper_task
+    if _sweeper_task is None:
+        _sweeper_task = asyncio.create_task(_sweeper(interval))
+
+
+async def stop() -> None:
+    global _sweeper_task
+    if _sweeper_task is not None:
+        _sweeper_task.cancel()
+        try:
+            await _sweeper_task
+        except asyncio.CancelledError:
+            pass
+        _sweeper_task = None
+
+
+def _mount_point(path: str) -> str:
+    path = os.path.realpath(path)
+    while not os.path.ismount(path):
+        path = os.path.dirname(path)
+    return path
+
+
+def _is_persistent(path: str) -> bool:
+    # Inside a container the root filesystem is thrown away on recreate; only mounts survive.
+    if not os.path.exists("/.dockerenv"):
+        return True
+    os.makedirs(path, exist_ok=True)
+    return _mount_point(path) != "/"
+
+
+_BLOB_TABLES = ("13. Documents", "01. Files")
+MIGRATE_BATCH_SIZE = 100
+
+
+def prepare_schema(conn) -> list:
+    # Runs at startup and only adds columns, so databases from before the blob store still boot.
+    # Their bytes stay in the inline "content" column until migrate_inline_content() is run.
+    inspector = inspect(conn)
+    tables = [t for t in _BLOB_TABLES if inspector.has_table(t)]
+    for table in tables:
+        columns = {c["name"] for c in inspector.get_columns(table)}
+        if "content_hash" not in columns:
+            conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN content_hash VARCHAR(64)'))
+            conn.execute(text(f'CREATE INDEX IF NOT EXISTS "ix_{table}_content_hash" ON "{table}" (content_hash)'))
+        if "content" not in columns:
+            conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN content BLOB'))
+        elif conn.execute(text(
+            f'SELECT 1 FROM "{table}" WHERE content_hash IS NULL AND content IS NOT NULL LIMIT 1'
+        )).first():
+            logger.warning(
+                'Table "%s" still stores file bytes inline; run `python -m app.services.blobstore migrate`.', table
+            )
+    return tables
+
+
+def _put_verified(store: BlobStore, data: bytes) -> Optional[str]:
+    expected = hashlib.sha256(data).hexdigest()
+    if store.put(data) != expected:
+        return None
+    digest = hashlib.sha256()
+    for chunk in store.iter_chunks(expected):
+        digest.update(chunk)
+    return expected if digest.hexdigest() == expected else None
+
+
+async def migrate_inline_content(batch_size: int = MIGRATE_BATCH_SIZE) -> int:
+    # Copies inline bytes into the store one batch at a time. A row's inline copy is only
+    # emptied once its blob has been read back and matches; the column itself is left in place.
+    from app.services.db import engine
+
+    if not BLOB_STORE_CONFIGURED or not _is_persistent(BLOB_STORE_DIR):
+        raise RuntimeError(
+            "Moving file bytes out of the database empties the inline copies, so set "
+            f"BLOB_STORE_DIR to a persistent volume first (currently {BLOB_STORE_DIR})."
+        )
+    store = get_blob_store()
+    async with engine.begin() as conn:
+        tables = await conn.run_sync(prepare_schema)
+
+    moved = 0
+    for table in tables:
+        after, table_moved = 0, 0
+        while True:
+            async with engine.connect() as conn:
+                rows = (await conn.execute(
+                    text(
+                        f'SELECT id, content FROM "{table}" WHERE id > :after '
+                        "AND content_hash IS NULL AND content IS NOT NULL ORDER BY id LIMIT :limit"
+                    ),
+                    {"after": after, "limit": batch_size},
+                )).all()
+            if not rows:
+                break
+            after = rows[-1][0]
+            verified = []
+            for row_id, content in rows:
+                digest = await asyncio.to_thread(_put_verified, store, bytes(content))
+                if digest is None:
+                    logger.error('Blob for "%s" row %s did not verify; keeping its inline copy', table, row_id)
+                    continue
+                verified.append({"digest": digest, "id": row_id, "empty": b""})
+            if verified:
+                async with engine.begin() as conn:
+                    await conn.execute(
+                        text(
+                            f'UPDATE "{table}" SET content_hash = :digest, content = :empty '
+                            "WHERE id = :id AND content_hash IS NULL"
+                        ),
+                        verified,
+                    )
+            table_moved += len(verified)
+            logger.info('Moved %d blobs from "%s" into the blob store', table_moved, table)
+        moved += table_moved
+    return moved
+
+
+if __name__ == "__main__":
+    import sys
+    if sys.argv[1:2] == ["migrate"]:
+        logging.basicConfig(level=logging.INFO)
+        batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else MIGRATE_BATCH_SIZE
+        print(f"[INFO] Moved {asyncio.run(migrate_inline_content(batch_size))} files into the blob store")
+    else:
+        print("Usage: python -m app.services.blobstore migrate [batch_size]")
@@ -0,0 +1,96 @@
+from __future__ import annotations
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import DOC_CACHE_TTL_DAYS, DOC_CACHE_MAX_BYTES
+from app.model.model import DocumentCache
+from app.services.summary import DocType
+
+
+@dataclass
+class CachedDocument:
+    text: str
+    doc_type: DocType
+    data: Optional[Dict[str, Any]]
+    summary: Optional[str]
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _cutoff() -> datetime:
+    return _now() - timedelta(days=DOC_CACHE_TTL_DAYS)
+
+
+async def get(db: AsyncSession, digest: str) -> Optional[CachedDocument]:
+    row = await db.get(DocumentCache, digest)
+    if row is None:
+        return None
+    if row.created_at.replace(tzinfo=row.created_at.tzinfo or timezone.utc) < _cutoff():
+        await db.delete(row)
+        await db.commit()
+        return None
+    try:
+        doc_type = DocType(row.doc_type)
+    except ValueError:
+        doc_type = DocType.UNKNOWN
+    if doc_type != DocType.UNKNOWN and not row.data:
+        # Left by a run whose extraction failed; treat as a miss so the next put replaces it.
+        return None
+    row.last_used_at = _now()
+    await db.commit()
+    return CachedDocument(
+        text=row.text,
+        doc_type=doc_type,
+        data=json.loads(row.data) if row.data else None,
+        summary=row.summary,
+    )
+
+
+async def put(
+    db: AsyncSession,
+    digest: str,
+    *,
+    text: str,
+    doc_type: DocType,
+    data: Optional[Dict[str, Any]],
+    summary: Optional[str],
+) -> None:
+    payload = json.dumps(data, ensure_ascii=False) if data else None
+    size = sum(len((part or "").encode("utf-8")) for part in (text, payload, summary))
+    now = _now()
+    await db.merge(DocumentCache(
+        content_hash=digest,
+        text=text or "",
+        doc_type=doc_type.value,
+        data=payload,
+        summary=summary,
+        size=size,
+        created_at=now,
+        last_used_at=now,
+    ))
+    await db.commit()
+    await prune(db)
+
+
+async def prune(db: AsyncSession) -> None:
+    await db.execute(delete(DocumentCache).where(DocumentCache.created_at < _cutoff()))
+    total = (await db.execute(select(func.coalesce(func.sum(DocumentCache.size), 0)))).scalar_one()
+    if total > DOC_CACHE_MAX_BYTES:
+        result = await db.execute(
+            select(DocumentCache.content_hash, DocumentCache.size).order_by(DocumentCache.last_used_at)
+        )
+        evict = []
+        for digest, size in result.all():
+            if total <= DOC_CACHE_MAX_BYTES:
+                break
+            evict.append(digest)
+            total -= size
+        await db.execute(delete(DocumentCache).where(DocumentCache.content_hash.in_(evict)))
+    await db.commit()
@@ -7,7 +7,8 @@ import subprocess
 
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.utils.tax_calculate import build_tax_return_context
+from app.services.tax_context import get_tax_return_context
+from app.services import blobstore
 
 def _get_jinja_env() -> Environment:
     base_dir = Path(__file__).resolve().parent.parent  
@@ -41,7 +42,7 @@ async def _store_generated_pdf(
         session_id=session_id,
         mime_type="application/pdf",
         size=len(pdf_bytes) if pdf_bytes is not None else 0,
-        content=pdf_bytes,
+        content_hash=await blobstore.put(pdf_bytes) if pdf_bytes else None,
     )
 
     db.add(record)
@@ -80,7 +81,7 @@ def _html_to_pdf_bytes(html: str) -> bytes:
     return completed.stdout
 
 async def generate_tax_return_pdf(db: AsyncSession, user_id: int, session_id: str) -> Tuple[bytes, str]:
-    context = await build_tax_return_context(db=db, user_id=user_id, session_id=session_id)
+    context = await get_tax_return_context(db=db, user_id=user_id, session_id=session_id)
     env = _get_jinja_env()
     template = env.get_template("tax_return.html")
     html = template.render(c=context)
@@ -98,7 +99,7 @@ async def generate_tax_return_pdf_with_overrides(
     session_id: str,
     overrides: Optional[Dict[str, Any]] = None,
 ) -> Tuple[bytes, str]:
-    context = await build_tax_return_context(db=db, user_id=user_id, session_id=session_id, overrides=overrides)
+    context = await get_tax_return_context(db=db, user_id=user_id, session_id=session_id, overrides=overrides)
     env = _get_jinja_env()
     template = env.get_template("tax_return.html")
     html = template.render(c=context)
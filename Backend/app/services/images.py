@@ -0,0 +1,117 @@
+from __future__ import annotations
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Any, Dict, Optional
+
+from app.core.config import IMAGE_WORKERS, OCR_IMAGE_MAX_EDGE, OCR_IMAGE_QUALITY
+
+logger = logging.getLogger(__name__)
+
+# Formats the vision endpoint accepts as-is; anything else is always re-encoded.
+OCR_MIME_TYPES = {"image/png", "image/jpeg", "image/gif", "image/webp"}
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=max(1, IMAGE_WORKERS),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+@dataclass
+class PreparedImage:
+    content: bytes
+    mime_type: str
+    original_size: int
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_size - len(self.content)
+
+
+class _Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.images = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def record(self, image: PreparedImage) -> None:
+        with self._lock:
+            self.images += 1
+            self.bytes_in += image.original_size
+            self.bytes_out += len(image.content)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "images": self.images,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "bytes_saved": self.bytes_in - self.bytes_out,
+            }
+
+
+_stats = _Stats()
+
+
+def _shrink(content: bytes, max_edge: int, quality: int) -> Optional[bytes]:
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return None
+
+    with Image.open(BytesIO(content)) as img:
+        img = ImageOps.exif_transpose(img)
+        img = img.convert("L")
+        img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        out = BytesIO()
+        img.save(out, format="JPEG", quality=quality, optimize=True)
+    return out.getvalue()
+
+
+async def prepare_for_ocr(
+    content: bytes,
+    mime_type: str,
+    *,
+    max_edge: int = OCR_IMAGE_MAX_EDGE,
+    quality: int = OCR_IMAGE_QUALITY,
+) -> PreparedImage:
+    loop = asyncio.get_running_loop()
+    try:
+        shrunk = await loop.run_in_executor(_get_pool(), _shrink, content, max_edge, quality)
+    except Exception as exc:
+        logger.warning("Image preprocessing failed, sending the original: %s", exc)
+        shrunk = None
+
+    if shrunk is not None and (len(shrunk) < len(content) or mime_type not in OCR_MIME_TYPES):
+        image = PreparedImage(shrunk, "image/jpeg", len(content))
+    else:
+        image = PreparedImage(content, mime_type, len(content))
+    _stats.record(image)
+    logger.info(
+        "OCR image: %d -> %d bytes (saved %d)",
+        image.original_size, len(image.content), image.saved_bytes,
+    )
+    return image
+
+
+def stats() -> Dict[str, Any]:
+    return _stats.stats()
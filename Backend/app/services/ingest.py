@@ -1,28 +1,230 @@
 import os
 import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 
-from app.utils.embedding import embed
-from app.utils.chunker import hierarchical_chunk
-from app.utils.cleaner import split_paragraphs
-from app.services.pinecone import upsert_document
+from app.core.config import EMBEDDING_CONCURRENCY, INGEST_MANIFEST_PATH
+from app.utils.embedding import embed_many
+from app.utils.chunker import Chunker
+from app.utils.cleaner import ParagraphSplitter
+from app.services.vectorstore import upsert_many, delete_many, flush as flush_vectors
+from app.services import lexical, pdf
 
-async def ingest_file(filepath: str):
-    print("[INFO] Ingesting file...")
-    import PyPDF2
+EMBED_BATCH_SIZE = 128
+PAGE_QUEUE_SIZE = 8
+PARAGRAPH_QUEUE_SIZE = 256
+CHUNK_QUEUE_SIZE = 2 * EMBED_BATCH_SIZE
+BATCH_QUEUE_SIZE = 4
+CHUNK_FEED_SIZE = 64
+
+_DONE = object()
+
+@dataclass
+class StageStats:
+    name: str
+    unit: str
+    items: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    finished: float | None = None
+
+    def done(self) -> None:
+        self.finished = time.perf_counter()
+
+    def report(self) -> str:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        rate = self.items / elapsed if elapsed > 0 else 0.0
+        return f"[INFO] {self.name}: {self.items} {self.unit} in {elapsed:.1f}s ({rate:.1f} {self.unit}/s)"
+
+def chunk_id(source: str, chunk: str) -> str:
+    return hashlib.sha256(f"{source}\n{chunk}".encode("utf-8")).hexdigest()[:32]
+
+def _file_sha256(filepath: str) -> str:
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _load_manifest() -> dict:
+    try:
+        with open(INGEST_MANIFEST_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def _save_manifest(manifest: dict) -> None:
+    os.makedirs(os.path.dirname(INGEST_MANIFEST_PATH) or ".", exist_ok=True)
+    tmp = INGEST_MANIFEST_PATH + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, INGEST_MANIFEST_PATH)
+
+async def _extract_pages(filepath: str, out: asyncio.Queue, stats: StageStats) -> None:
     if filepath.lower().endswith('.pdf'):
-        with open(filepath, 'rb') as f:
-            text = "".join((page.extract_text() or "") for page in PyPDF2.PdfReader(f).pages)
-        print(f"[INFO] Extracted PDF.\n[INFO] Total: {len(text)} chars")
+        # The CLI reads whole documents; the upload page and time limits do not apply.
+        async for text in pdf.iter_pages(filepath, max_pages=None, timeout=None):
+            stats.items += 1
+            await out.put(text)
     else:
         with open(filepath, 'r', encoding='utf-8') as f:
-            text = f.read()
-    paragraphs = split_paragraphs(text)
-    print(f"[INFO] Total: {len(paragraphs)} paragraphs")
-    for i, para in enumerate(paragraphs):
-        for j, chunk in enumerate(hierarchical_chunk(para)):
-            print(f"[INFO] Paragraph {i+1}/{len(paragraphs)} Chunk {j+1}: {len(chunk)} chars")
-            embedding = await embed(chunk)
-            upsert_document(chunk, embedding)
+            for text in iter(lambda: f.read(64 * 1024), ""):
+                stats.items += 1
+                await out.put(text)
+    stats.done()
+    await out.put(_DONE)
+
+async def _split_paragraphs(inq: asyncio.Queue, out: asyncio.Queue, stats: StageStats) -> None:
+    splitter = ParagraphSplitter()
+    tail = ""
+    while (text := await inq.get()) is not _DONE:
+        lines = (tail + text).split("\n")
+        tail = lines.pop()
+        for line in lines:
+            paragraph = splitter.feed(line)
+            if paragraph:
+                stats.items += 1
+                await out.put(paragraph)
+    for paragraph in (splitter.feed(tail), splitter.close()):
+        if paragraph:
+            stats.items += 1
+            await out.put(paragraph)
+    stats.done()
+    await out.put(_DONE)
+
+async def _chunk(
+    inq: asyncio.Queue,
+    out: asyncio.Queue,
+    stats: StageStats,
+    *,
+    source: str,
+    known: set[str],
+    seen: set[str],
+) -> None:
+    chunker = Chunker()
+
+    async def emit(chunks: list[str]) -> None:
+        for chunk in chunks:
+            stats.items += 1
+            doc_id = chunk_id(source, chunk)
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+            if doc_id not in known:
+                await out.put((doc_id, chunk))
+
+    pending: list[str] = []
+    while (paragraph := await inq.get()) is not _DONE:
+        pending.append(paragraph)
+        if len(pending) >= CHUNK_FEED_SIZE:
+            await emit(await asyncio.to_thread(chunker.feed, pending))
+            pending = []
+    await emit(await asyncio.to_thread(chunker.feed, pending) + chunker.close())
+    stats.done()
+    await out.put(_DONE)
+
+async def _embed(inq: asyncio.Queue, out: asyncio.Queue, stats: StageStats) -> None:
+    finished = False
+    while not finished:
+        batch: list[tuple[str, str]] = []
+        while len(batch) < EMBED_BATCH_SIZE:
+            item = await inq.get()
+            if item is _DONE:
+                await inq.put(_DONE)
+                finished = True
+                break
+            batch.append(item)
+        if batch:
+            embeddings = await embed_many([chunk for _, chunk in batch], batch_size=EMBED_BATCH_SIZE, concurrency=1)
+            stats.items += len(batch)
+            await out.put((batch, embeddings))
+
+async def _upsert(inq: asyncio.Queue, stats: StageStats, *, source: str) -> None:
+    while (item := await inq.get()) is not _DONE:
+        batch, embeddings = item
+        await upsert_many([
+            {"id": doc_id, "values": embedding, "metadata": {"text": chunk, "source": source}}
+            for (doc_id, chunk), embedding in zip(batch, embeddings)
+        ])
+        await lexical.add_many(batch)
+        stats.items += len(batch)
+        print(f"[INFO] Upserted {stats.items} new chunks")
+    stats.done()
+
+async def ingest_file(filepath: str):
+    print("[INFO] Ingesting file...")
+    source = os.path.basename(filepath)
+    file_hash = _file_sha256(filepath)
+    manifest = _load_manifest()
+    previous = manifest.get(source) or {}
+    known = set(previous.get("chunks") or [])
+    if previous.get("sha256") == file_hash:
+        print(f"[INFO] {source} is unchanged since {previous.get('ingested_at')}; nothing to do.")
+        return
+    seen: set[str] = set()
+
+    pages: asyncio.Queue = asyncio.Queue(maxsize=PAGE_QUEUE_SIZE)
+    paragraphs: asyncio.Queue = asyncio.Queue(maxsize=PARAGRAPH_QUEUE_SIZE)
+    chunks: asyncio.Queue = asyncio.Queue(maxsize=CHUNK_QUEUE_SIZE)
+    batches: asyncio.Queue = asyncio.Queue(maxsize=BATCH_QUEUE_SIZE)
+
+    stats = {
+        "extract": StageStats("extract", "pages"),
+        "split": StageStats("split", "paragraphs"),
+        "chunk": StageStats("chunk", "chunks"),
+        "embed": StageStats("embed", "chunks"),
+        "upsert": StageStats("upsert", "chunks"),
+    }
+    embedders = [
+        asyncio.create_task(_embed(chunks, batches, stats["embed"]))
+        for _ in range(max(1, EMBEDDING_CONCURRENCY))
+    ]
+
+    async def _finish_embedding() -> None:
+        await asyncio.gather(*embedders)
+        stats["embed"].done()
+        await batches.put(_DONE)
+
+    tasks = [
+        asyncio.create_task(_extract_pages(filepath, pages, stats["extract"])),
+        asyncio.create_task(_split_paragraphs(pages, paragraphs, stats["split"])),
+        asyncio.create_task(_chunk(paragraphs, chunks, stats["chunk"], source=source, known=known, seen=seen)),
+        *embedders,
+        asyncio.create_task(_finish_embedding()),
+        asyncio.create_task(_upsert(batches, stats["upsert"], source=source)),
+    ]
+    try:
+        # Await every stage together so a failure anywhere, including the upserter, surfaces at once.
+        await asyncio.gather(*tasks)
+    except BaseException:
+        # Only a complete pass may prune chunks or record the file as ingested; keep what was written.
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await flush_vectors()
+        await lexical.flush()
+        print(f"[ERROR] {source}: ingest did not finish; kept existing chunks and left the manifest unchanged.")
+        raise
+
+    stale = sorted(known - seen)
+    if stale:
+        await delete_many(stale)
+        await lexical.delete_many(stale)
+    await flush_vectors()
+    await lexical.flush()
+
+    manifest[source] = {
+        "sha256": file_hash,
+        "chunks": sorted(seen),
+        "ingested_at": datetime.now(timezone.utc).isoformat(),
+    }
+    _save_manifest(manifest)
+
+    for stage in stats.values():
+        print(stage.report())
+    print(f"[INFO] {source}: {len(seen)} chunks, {len(seen - known)} new, {len(known & seen)} unchanged, {len(stale)} removed")
 
 if __name__ == "__main__":
     import sys
@@ -33,4 +235,4 @@ if __name__ == "__main__":
         else:
             print("[ERROR] Please provide a valid PDF file path.")
     else:
-        print("Usage: python ingest.py <file.pdf>")
\ No newline at end of file
+        print("Usage: python ingest.py <file.pdf>")
@@ -0,0 +1,215 @@
+from __future__ import annotations
+import asyncio
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+
+from app.core.config import UPLOAD_WORKERS
+from app.model.model import UploadJob, UploadedDocument
+from app.services.db import async_session
+from app.services import blobstore, doc_cache
+from app.services.session import persist_message
+from app.services.summary import analyze_document, DocType
+from app.utils.information import persist_structured_info
+from app.utils.parsing import extract_text
+
+logger = logging.getLogger(__name__)
+
+FINISHED = ("done", "failed")
+
+_queue: Optional[asyncio.Queue] = None
+_workers: List[asyncio.Task] = []
+_changed: Dict[str, asyncio.Event] = {}
+_watchers: Dict[str, int] = {}
+
+
+def _get_queue() -> asyncio.Queue:
+    global _queue
+    if _queue is None:
+        _queue = asyncio.Queue()
+    return _queue
+
+
+def job_dict(job: UploadJob) -> Dict[str, Any]:
+    return {
+        "job_id": job.id,
+        "document_id": job.document_id,
+        "session_id": job.session_id,
+        "status": job.status,
+        "stage": job.stage,
+        "doc_type": job.doc_type,
+        "summary": job.summary,
+        "error": job.error,
+    }
+
+
+def changed_event(job_id: str) -> asyncio.Event:
+    return _changed.setdefault(job_id, asyncio.Event())
+
+
+def watch(job_id: str) -> None:
+    _watchers[job_id] = _watchers.get(job_id, 0) + 1
+
+
+def unwatch(job_id: str) -> None:
+    # The last listener to leave drops the event so abandoned jobs do not accumulate.
+    count = _watchers.pop(job_id, 1) - 1
+    if count > 0:
+        _watchers[job_id] = count
+    else:
+        _changed.pop(job_id, None)
+
+
+def _notify(job_id: str) -> None:
+    event = _changed.pop(job_id, None)
+    if event is not None:
+        event.set()
+
+
+async def _update(db, job: UploadJob, **fields) -> None:
+    for key, value in fields.items():
+        setattr(job, key, value)
+    await db.commit()
+    _notify(job.id)
+
+
+async def enqueue(job_id: str) -> None:
+    await _get_queue().put(job_id)
+
+
+async def _finish(
+    db,
+    job: UploadJob,
+    filename: Optional[str],
+    doc_type: DocType,
+    structured: Optional[Dict[str, Any]],
+    summary: Optional[str],
+) -> UploadJob:
+    job_id = job.id
+    await _update(db, job, status="running", stage="saving", doc_type=doc_type.value)
+    try:
+        if doc_type != DocType.UNKNOWN and structured:
+            await persist_structured_info(
+                db,
+                session_id=job.session_id,
+                user_id=job.user_id,
+                doc_type=doc_type,
+                data=structured,
+            )
+
+        if doc_type == DocType.UNKNOWN and not summary:
+            summary = "Provide a concise summary with bullet points.\n- Summary within 4-5 sentences maximum\n"
+
+        if summary:
+            await persist_message(
+                db,
+                job.session_id,
+                "assistant",
+                f"Summary: {filename}\n{summary}",
+            )
+    except Exception:
+        logger.exception("Upload job %s: saving results failed", job_id)
+        await db.rollback()
+        job = await db.get(UploadJob, job_id)
+        summary = None
+
+    await _update(db, job, status="done", stage="done", summary=summary)
+    return job
+
+
+async def complete_from_cache(db, job: UploadJob, filename: Optional[str], cached: doc_cache.CachedDocument) -> UploadJob:
+    return await _finish(db, job, filename, cached.doc_type, cached.data, cached.summary)
+
+
+async def _process(job_id: str) -> None:
+    async with async_session() as db:
+        job = await db.get(UploadJob, job_id)
+        if job is None or job.status in FINISHED:
+            return
+        doc = await db.get(UploadedDocument, job.document_id)
+        if doc is None:
+            await _update(db, job, status="failed", stage="failed", error="Document not found")
+            return
+
+        digest = doc.content_hash
+        content: Optional[bytes] = None
+        if digest is None:
+            # Uploaded before the blob store and not yet moved out by `python -m app.services.blobstore migrate`.
+            content = await db.scalar(select(UploadedDocument.content).where(UploadedDocument.id == doc.id)) or b""
+            digest = hashlib.sha256(content).hexdigest()
+        cached = await doc_cache.get(db, digest)
+        if cached is not None:
+            await complete_from_cache(db, job, doc.filename, cached)
+            return
+
+        await _update(db, job, status="running", stage="extracting")
+        try:
+            extracted_text = await extract_text(
+                filename=doc.filename,
+                mime_type=doc.mime_type,
+                content=content if content is not None else await blobstore.read(digest),
+            )
+            await _update(db, job, stage="analyzing")
+            analysis = await analyze_document(filename=doc.filename or "document", text=extracted_text)
+        except Exception:
+            logger.exception("Upload job %s: analysis failed", job_id)
+            await _finish(db, job, doc.filename, DocType.UNKNOWN, None, None)
+            return
+
+        # A typed result without validated fields is a failed extraction; retry it next time.
+        if analysis.doc_type == DocType.UNKNOWN:
+            cacheable = bool(analysis.summary)
+        else:
+            cacheable = analysis.data is not None
+        if cacheable:
+            await doc_cache.put(
+                db,
+                digest,
+                text=extracted_text,
+                doc_type=analysis.doc_type,
+                data=analysis.data,
+                summary=analysis.summary,
+            )
+        await _finish(db, job, doc.filename, analysis.doc_type, analysis.data, analysis.summary)
+
+
+async def _worker() -> None:
+    queue = _get_queue()
+    while True:
+        job_id = await queue.get()
+        try:
+            await _process(job_id)
+        except Exception as exc:
+            logger.exception("Upload job %s failed", job_id)
+            try:
+                async with async_session() as db:
+                    job = await db.get(UploadJob, job_id)
+                    if job is not None:
+                        await _update(db, job, status="failed", stage="failed", error=str(exc))
+            except Exception:
+                logger.exception("Upload job %s: could not record failure", job_id)
+        finally:
+            queue.task_done()
+
+
+async def start(workers: int = UPLOAD_WORKERS) -> None:
+    queue = _get_queue()
+    # Jobs left queued or half-done by a previous process are picked up again.
+    async with async_session() as db:
+        result = await db.execute(
+            select(UploadJob.id)
+            .where(UploadJob.status.in_(("queued", "running")))
+            .order_by(UploadJob.created_at)
+        )
+        for job_id in result.scalars().all():
+            queue.put_nowait(job_id)
+    _workers.extend(asyncio.create_task(_worker()) for _ in range(max(1, workers)))
+
+
+async def stop() -> None:
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
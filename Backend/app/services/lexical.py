@@ -0,0 +1,208 @@
+from __future__ import annotations
+import asyncio
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import LEXICAL_INDEX_DIR
+from app.services.vectorstore import VectorMatch
+
+# Latin letters, ASCII digits and the Bengali block (letters, vowel signs and digits).
+_TOKEN_RE = re.compile(r"[0-9a-z\u0980-\u09ff]+")
+# Dotted abbreviations such as "S.R.O." index as a single term ("sro").
+_ABBREV_RE = re.compile(r"\b(?:[a-z]\.){2,}")
+
+
+def tokenize(text: str) -> List[str]:
+    lowered = _ABBREV_RE.sub(lambda m: m.group(0).replace(".", ""), (text or "").lower())
+    return _TOKEN_RE.findall(lowered)
+
+
+class LexicalIndex:
+    DOCS_FILE = "docs.json"
+    POSTINGS_FILE = "postings.npz"
+
+    def __init__(self, path: str, *, k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._docs: Dict[str, str] = {}
+        self._dirty = False
+        self._ids: List[str] = []
+        self._terms: Dict[str, int] = {}
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._post_docs = np.zeros(0, dtype=np.int32)
+        self._post_tfs = np.zeros(0, dtype=np.int32)
+        self._doc_lens = np.zeros(0, dtype=np.float32)
+        self._stamp: Optional[int] = None
+        self._load()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _current_stamp(self) -> Optional[int]:
+        try:
+            return os.stat(self._file(self.POSTINGS_FILE)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self) -> None:
+        stamp = self._current_stamp()
+        self._stamp = stamp
+        if stamp is None:
+            return
+        with open(self._file(self.DOCS_FILE), "r", encoding="utf-8") as f:
+            self._docs = dict(json.load(f))
+        with np.load(self._file(self.POSTINGS_FILE), allow_pickle=False) as data:
+            self._ids = [str(x) for x in data["ids"]]
+            self._terms = {str(t): i for i, t in enumerate(data["terms"])}
+            self._offsets = data["offsets"]
+            self._post_docs = data["post_docs"]
+            self._post_tfs = data["post_tfs"]
+            self._doc_lens = data["doc_lens"]
+        self._dirty = False
+
+    def _maybe_reload(self) -> None:
+        if not self._dirty and self._current_stamp() != self._stamp:
+            self._load()
+
+    def add_many(self, items: Iterable[tuple]) -> None:
+        with self._lock:
+            self._maybe_reload()
+            for doc_id, text in items:
+                self._docs[str(doc_id)] = text
+            self._dirty = True
+
+    def delete_many(self, doc_ids: Iterable[str]) -> None:
+        with self._lock:
+            self._maybe_reload()
+            for doc_id in doc_ids:
+                self._docs.pop(str(doc_id), None)
+            self._dirty = True
+
+    def _compile(self) -> None:
+        ids = list(self._docs)
+        postings: Dict[str, List[tuple]] = {}
+        doc_lens = np.zeros(len(ids), dtype=np.float32)
+        for row, doc_id in enumerate(ids):
+            counts = Counter(tokenize(self._docs[doc_id]))
+            doc_lens[row] = sum(counts.values())
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((row, tf))
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        for i, term in enumerate(terms):
+            offsets[i + 1] = offsets[i] + len(postings[term])
+        post_docs = np.empty(int(offsets[-1]), dtype=np.int32)
+        post_tfs = np.empty(int(offsets[-1]), dtype=np.int32)
+        for i, term in enumerate(terms):
+            rows = postings[term]
+            post_docs[offsets[i]:offsets[i + 1]] = [r for r, _ in rows]
+            post_tfs[offsets[i]:offsets[i + 1]] = [tf for _, tf in rows]
+
+        self._ids = ids
+        self._terms = {t: i for i, t in enumerate(terms)}
+        self._offsets = offsets
+        self._post_docs = post_docs
+        self._post_tfs = post_tfs
+        self._doc_lens = doc_lens
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            self._compile()
+            os.makedirs(self.path, exist_ok=True)
+            tmp_docs = self._file(self.DOCS_FILE + ".tmp")
+            with open(tmp_docs, "w", encoding="utf-8") as f:
+                json.dump(self._docs, f, ensure_ascii=False)
+            os.replace(tmp_docs, self._file(self.DOCS_FILE))
+            tmp_postings = self._file(self.POSTINGS_FILE + ".tmp")
+            with open(tmp_postings, "wb") as f:
+                np.savez(
+                    f,
+                    ids=np.array(self._ids, dtype=str),
+                    terms=np.array(sorted(self._terms, key=self._terms.get), dtype=str),
+                    offsets=self._offsets,
+                    post_docs=self._post_docs,
+                    post_tfs=self._post_tfs,
+                    doc_lens=self._doc_lens,
+                )
+            os.replace(tmp_postings, self._file(self.POSTINGS_FILE))
+            self._stamp = self._current_stamp()
+            self._dirty = False
+
+    def search(self, query: str, top_k: int = 10) -> List[VectorMatch]:
+        with self._lock:
+            self._maybe_reload()
+            ids, terms, offsets = self._ids, self._terms, self._offsets
+            post_docs, post_tfs, doc_lens = self._post_docs, self._post_tfs, self._doc_lens
+
+        n = len(ids)
+        if n == 0 or top_k <= 0:
+            return []
+        avg_len = float(doc_lens.mean()) or 1.0
+        scores = np.zeros(n, dtype=np.float32)
+        for term in set(tokenize(query)):
+            t = terms.get(term)
+            if t is None:
+                continue
+            docs = post_docs[offsets[t]:offsets[t + 1]]
+            tfs = post_tfs[offsets[t]:offsets[t + 1]].astype(np.float32)
+            idf = math.log(1.0 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * doc_lens[docs] / avg_len)
+            scores[docs] += idf * tfs * (self.k1 + 1.0) / (tfs + norm)
+
+        hits = np.flatnonzero(scores > 0)
+        if len(hits) == 0:
+            return []
+        k = min(top_k, len(hits))
+        top = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [
+            VectorMatch(id=ids[row], score=float(scores[row]), metadata={"text": self._docs.get(ids[row], "")})
+            for row in top.tolist()
+        ]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Any]], *, k: int = 60, limit: Optional[int] = None) -> List[VectorMatch]:
+    fused: Dict[str, float] = {}
+    first_seen: Dict[str, Any] = {}
+    for ranking in rankings:
+        for rank, match in enumerate(ranking, start=1):
+            fused[match.id] = fused.get(match.id, 0.0) + 1.0 / (k + rank)
+            first_seen.setdefault(match.id, match)
+    ordered = sorted(fused, key=fused.get, reverse=True)
+    if limit is not None:
+        ordered = ordered[:limit]
+    return [
+        VectorMatch(id=doc_id, score=fused[doc_id], metadata=dict(first_seen[doc_id].metadata or {}))
+        for doc_id in ordered
+    ]
+
+
+lexical_index = LexicalIndex(LEXICAL_INDEX_DIR)
+
+
+async def add_many(items: Iterable[tuple]) -> None:
+    await asyncio.to_thread(lexical_index.add_many, list(items))
+
+
+async def delete_many(doc_ids: Iterable[str]) -> None:
+    await asyncio.to_thread(lexical_index.delete_many, list(doc_ids))
+
+
+async def flush() -> None:
+    await asyncio.to_thread(lexical_index.flush)
+
+
+def search(query: str, top_k: int = 10) -> List[VectorMatch]:
+    return lexical_index.search(query, top_k)
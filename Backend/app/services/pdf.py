@@ -0,0 +1,250 @@
+from __future__ import annotations
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from app.core.config import PDF_WORKERS, PDF_MAX_PAGES, PDF_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+PdfSource = Union[bytes, str]
+
+_IMAGE_MIMES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".gif": "image/gif",
+    ".jp2": "image/jp2",
+    ".tiff": "image/tiff",
+    ".tif": "image/tiff",
+}
+
+# Small ranges keep results flowing page by page; large ones amortize per-task overhead.
+PAGES_PER_TASK = 16
+
+# How long a timed-out worker may take to reach its next page check before the pool is recycled.
+STUCK_GRACE = 1.0
+
+_pool: ProcessPoolExecutor | None = None
+
+
+class IncompleteExtraction(Exception):
+    def __init__(self, reason: str, pages: int):
+        super().__init__(f"PDF extraction stopped after {pages} pages: {reason}")
+        self.reason = reason
+        self.pages = pages
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=max(1, PDF_WORKERS),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _reset_pool(pool: ProcessPoolExecutor) -> None:
+    # A page stuck inside PyPDF2 ignores cancel(); killing the workers is the only way to free them.
+    global _pool
+    if _pool is pool:
+        _pool = None
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+
+def _open(source: PdfSource):
+    import PyPDF2
+
+    return PyPDF2.PdfReader(BytesIO(source) if isinstance(source, bytes) else source)
+
+
+def _split(source: PdfSource, groups: List[List[int]]) -> List[bytes]:
+    # Parse the document once and hand each worker a small PDF holding only its pages.
+    import PyPDF2
+
+    pages = _open(source).pages
+    parts = []
+    for numbers in groups:
+        writer = PyPDF2.PdfWriter()
+        for number in numbers:
+            writer.add_page(pages[number])
+        buffer = BytesIO()
+        writer.write(buffer)
+        parts.append(buffer.getvalue())
+    return parts
+
+
+def _split_ranges(source: PdfSource, max_pages: Optional[int]) -> Tuple[int, List[Tuple[int, bytes]]]:
+    total = len(_open(source).pages)
+    count = total if max_pages is None else min(total, max_pages)
+    step = max(1, min(PAGES_PER_TASK, math.ceil(count / max(1, PDF_WORKERS))))
+    groups = [list(range(start, min(start + step, count))) for start in range(0, count, step)]
+    return total, [(len(numbers), part) for numbers, part in zip(groups, _split(source, groups))]
+
+
+def _extract_range(part: bytes, budget: float) -> List[str]:
+    # Stops between pages once its own running time exceeds the budget; a short list means it ran out.
+    stop = time.monotonic() + budget
+    texts = []
+    for page in _open(part).pages:
+        if time.monotonic() > stop:
+            break
+        try:
+            texts.append(page.extract_text() or "")
+        except Exception:
+            texts.append("")
+    return texts
+
+
+async def _abandon(pool: ProcessPoolExecutor, futures: List[Future]) -> None:
+    for future in futures:
+        future.cancel()
+    # Workers stop at the next page boundary; one that does not is stuck inside a page.
+    running = [asyncio.wrap_future(future) for future in futures if not future.done()]
+    if running:
+        _, stuck = await asyncio.wait(running, timeout=STUCK_GRACE)
+        if stuck:
+            for waiter in stuck:
+                waiter.add_done_callback(lambda f: f.cancelled() or f.exception())
+            _reset_pool(pool)
+
+
+async def iter_pages(
+    source: PdfSource,
+    *,
+    max_pages: Optional[int] = PDF_MAX_PAGES,
+    timeout: Optional[float] = PDF_TIMEOUT,
+) -> AsyncIterator[str]:
+    # None lifts a limit. Only time spent waiting on workers counts against the timeout, so a
+    # slow consumer does not eat into it; a cut-short read yields what it has, then raises.
+    pool = _get_pool()
+    budget = math.inf if timeout is None else timeout
+    spent = 0.0
+
+    async def wait(future: Future):
+        nonlocal spent
+        remaining = budget - spent
+        if remaining <= 0:
+            raise asyncio.TimeoutError
+        started = time.monotonic()
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future), None if math.isinf(remaining) else remaining
+            )
+        finally:
+            spent += time.monotonic() - started
+
+    futures: List[Future] = []
+    yielded = 0
+    reason: Optional[str] = None
+    try:
+        futures = [pool.submit(_split_ranges, source, max_pages)]
+        total, parts = await wait(futures[0])
+        if max_pages is not None and total > max_pages:
+            reason = f"page limit of {max_pages} reached ({total} pages)"
+        futures = [pool.submit(_extract_range, part, budget - spent) for _, part in parts]
+        counts = [count for count, _ in parts]
+        del parts
+        for future, count in zip(futures, counts):
+            texts = await wait(future)
+            for text in texts:
+                yield text
+                yielded += 1
+            if len(texts) < count:
+                raise asyncio.TimeoutError
+    except asyncio.TimeoutError:
+        reason = f"exceeded {budget:.0f}s"
+        await _abandon(pool, futures)
+    except BrokenProcessPool:
+        reason = "worker pool was reset"
+        _reset_pool(pool)
+    finally:
+        for future in futures:
+            future.cancel()
+    if reason is not None:
+        raise IncompleteExtraction(reason, yielded)
+
+
+async def extract_pages(
+    source: PdfSource,
+    *,
+    max_pages: Optional[int] = PDF_MAX_PAGES,
+    timeout: Optional[float] = PDF_TIMEOUT,
+) -> List[str]:
+    # Uploads are analysed from their leading pages, so a cut-short read is still usable here.
+    pages: List[str] = []
+    try:
+        async for text in iter_pages(source, max_pages=max_pages, timeout=timeout):
+            pages.append(text)
+    except IncompleteExtraction as exc:
+        logger.warning("%s; using the partial text", exc)
+    return pages
+
+
+def _page_images(part: bytes, numbers: List[int], budget: float) -> Dict[int, Tuple[bytes, str]]:
+    # Scanned pages are usually one full-page picture; keep the largest image per page.
+    stop = time.monotonic() + budget
+    found: Dict[int, Tuple[bytes, str]] = {}
+    for number, page in zip(numbers, _open(part).pages):
+        if time.monotonic() > stop:
+            break
+        try:
+            candidates = list(page.images)
+        except Exception:
+            continue
+        if candidates:
+            best = max(candidates, key=lambda image: len(image.data))
+            ext = os.path.splitext(best.name)[1].lower()
+            found[number] = (best.data, _IMAGE_MIMES.get(ext, "application/octet-stream"))
+    return found
+
+
+async def page_images(
+    source: PdfSource,
+    numbers: List[int],
+    *,
+    timeout: float = PDF_TIMEOUT,
+) -> Dict[int, Tuple[bytes, str]]:
+    if not numbers:
+        return {}
+    pool = _get_pool()
+    step = max(1, math.ceil(len(numbers) / max(1, PDF_WORKERS)))
+    groups = [numbers[start:start + step] for start in range(0, len(numbers), step)]
+    found: Dict[int, Tuple[bytes, str]] = {}
+    futures: List[Future] = []
+    try:
+        futures = [pool.submit(_split, source, groups)]
+        started = time.monotonic()
+        parts = await asyncio.wait_for(asyncio.wrap_future(futures[0]), timeout)
+        remaining = max(0.0, timeout - (time.monotonic() - started))
+        futures = [
+            pool.submit(_page_images, part, group, remaining) for part, group in zip(parts, groups)
+        ]
+        del parts
+        for result in await asyncio.wait_for(asyncio.gather(*map(asyncio.wrap_future, futures)), remaining):
+            found.update(result)
+    except asyncio.TimeoutError:
+        logger.warning("PDF image extraction exceeded %.0fs", timeout)
+        await _abandon(pool, futures)
+    except BrokenProcessPool:
+        logger.warning("PDF worker pool was reset during image extraction")
+        _reset_pool(pool)
+    return found
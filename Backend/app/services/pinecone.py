@@ -1,26 +1,31 @@
 import asyncio
 import uuid
 from pinecone import Pinecone, ServerlessSpec
-from app.core.config import PINECONE_API_KEY, PINECONE_INDEX
-pc = Pinecone(api_key=PINECONE_API_KEY)
+from app.core.config import PINECONE_API_KEY, PINECONE_INDEX, EMBEDDING_DIM
+
+_index = None
+
 def get_or_create_index():
+    global _index
+    if _index is not None:
+        return _index
+    pc = Pinecone(api_key=PINECONE_API_KEY)
     indexes = [i["name"] for i in pc.list_indexes()]
 
     if PINECONE_INDEX not in indexes:
         pc.create_index(
             name=PINECONE_INDEX,
-            dimension=1536,
+            dimension=EMBEDDING_DIM,
             metric="cosine",
             spec=ServerlessSpec(cloud="aws", region="us-east-1")
         )
-    return pc.Index(PINECONE_INDEX)
-
-index = get_or_create_index()
+    _index = pc.Index(PINECONE_INDEX)
+    return _index
 
-def upsert_document(text: str, embedding: list, metadata: dict = None):
-    doc_id = str(uuid.uuid4())
+def upsert_document(text: str, embedding: list, metadata: dict = None, doc_id: str | None = None):
+    doc_id = doc_id or str(uuid.uuid4())
 
-    index.upsert(
+    get_or_create_index().upsert(
         vectors=[{
             "id": doc_id,
             "values": embedding,
@@ -30,7 +35,7 @@ def upsert_document(text: str, embedding: list, metadata: dict = None):
     return doc_id
 
 def search_index(embedding: list, top_k: int = 10):
-    res = index.query(
+    res = get_or_create_index().query(
         vector=embedding,
         top_k=top_k,
         include_metadata=True
@@ -41,4 +46,4 @@ async def upsert(text: str, embedding: list, metadata: dict | None = None) -> st
     return await asyncio.to_thread(upsert_document, text, embedding, metadata)
 
 async def search(embedding: list, top_k: int = 10):
-    return await asyncio.to_thread(search_index, embedding, top_k)
\ No newline at end of file
+    return await asyncio.to_thread(search_index, embedding, top_k)
@@ -1,10 +1,25 @@
-from typing import List, Tuple, Optional, Dict
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, List, Tuple, Optional, Dict
 from openai import AsyncOpenAI
-from app.core.config import OPENAI_API_KEY, GPT_MODEL
+from app.core.config import OPENAI_API_KEY, GPT_MODEL, LEXICAL_MIN_SCORE, PROMPT_TOKEN_BUDGET
 from app.utils.embedding import embed
-from .pinecone import search
+from app.utils.prompt import MESSAGE_OVERHEAD_TOKENS, TokenBudget
+from .answer_cache import answer_cache
+from .lexical import reciprocal_rank_fusion, search as lexical_search
+from .vectorstore import search
 
 client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+logger = logging.getLogger(__name__)
+
+_RAG_INSTRUCTIONS = (
+    "Small or focused questions: reply in 1–2 short sentences.\n"
+    "Bigger questions or calculation: one summary sentence, add 3-5 bullet points for clarity.\n"
+    "Do not introduce yourself."
+)
+_RAG_INSTRUCTIONS_FALLBACK = "Rely on fully knowledge of Income Tax Act 2023.\n" + _RAG_INSTRUCTIONS
 
 def _detect_language(text: str) -> str:
     for ch in text:
@@ -12,35 +27,113 @@ def _detect_language(text: str) -> str:
             return 'bn'
     return 'en'
 
-async def rag_answer(query: str, top_k: int = 10, score_threshold: float = 0.7, chat_history: Optional[List[Dict]] = None) -> Tuple[str, List[dict]]:
-    query_emb = await embed(query)
-    raw_results = await search(query_emb, top_k)
+def _clean_answer(text: str) -> str:
+    return text.replace('—', ', ')
+
+@dataclass
+class _Prompt:
+    messages: List[Dict]
+    sources: List[dict]
+    is_rag_mode: bool
+    query_emb: List[float]
+    lang: str
+    source_ids: List[str]
+    cacheable: bool
+    token_usage: Dict[str, int] = field(default_factory=dict)
+
+async def _build_prompt(query: str, top_k: int, score_threshold: float, chat_history: Optional[List[Dict]], conversation_summary: Optional[str] = None) -> _Prompt:
+    async def _vector_search() -> Tuple[List[float], List]:
+        emb = await embed(query)
+        return emb, await search(emb, top_k)
+
+    # BM25 scoring is CPU-bound; keep it off the event loop and overlap it with the embedding round trip.
+    (query_emb, raw_results), lexical_raw = await asyncio.gather(
+        _vector_search(),
+        asyncio.to_thread(lexical_search, query, top_k),
+    )
     valid_results = [r for r in raw_results if r.score >= score_threshold]
-    context_blocks: List[str] = []
-    sources: List[dict] = []
+    lexical_results = [r for r in lexical_raw if r.score >= LEXICAL_MIN_SCORE]
+    if lexical_results:
+        valid_results = reciprocal_rank_fusion([valid_results, lexical_results], limit=top_k)
 
-    for idx, r in enumerate(valid_results, start=1):
-        text = (r.metadata or {}).get("text") or ""
-        if text:
-            context_blocks.append(f"[{idx}] {text}")
-            sources.append({
-                "id": r.id,
-                "score": r.score,
-                "text": text,
-            })
+    lang = _detect_language(query)
+    target_lang_instruction = (
+        "Answer only in Bangla."
+        if lang == 'bn' else
+        "Answer only in English."
+    )
 
-    summary_blocks: List[str] = []
+    system_prompt = (
+        "You are a Senior Bangladeshi tax Advisor, expert in the Income Tax Act 2023 and current NBR rules & Regulations. "
+        "Always provide clear, concise, and practical answers in friendly manner."
+        + target_lang_instruction + " If any context or user input is in another language, translate it and always answer only in the target language.\n"
+    )
+
+    chunk_results = [r for r in valid_results if (r.metadata or {}).get("text")]
+
+    summary_messages: List[Dict] = []
+    recent_turns: List[Dict] = []
     if chat_history:
-        for m in chat_history[-20:]:
+        for m in chat_history:
             content = (m.get("content") or "").strip()
             role = (m.get("role") or "").strip().lower()
             if role == "assistant" and content.startswith("Summary:"):
-                summary_blocks.append(content)
-                sources.append({
-                    "id": f"summary-{m.get('id')}",
-                    "score": 1.0,
-                    "text": content,
-                })
+                summary_messages.append(m)
+        for m in chat_history[-30:]:
+            content = m.get("content") or ""
+            if content and not (m.get("role") == "assistant" and content.strip().startswith("Summary:")):
+                recent_turns.append(m)
+
+    # The chat endpoints persist the question before loading history, so it arrives as the last turn.
+    prior_turns = recent_turns
+    if prior_turns and prior_turns[-1].get("role") == "user" and (prior_turns[-1].get("content") or "").strip() == query.strip():
+        prior_turns = prior_turns[:-1]
+    # Cache entries are keyed on the question and sources only, so an answer shaped by the
+    # conversation so far must not be stored or served.
+    cacheable = not (summary_messages or prior_turns or conversation_summary)
+
+    budget = TokenBudget(PROMPT_TOKEN_BUDGET, model=GPT_MODEL)
+    budget.reserve("system", system_prompt, overhead=MESSAGE_OVERHEAD_TOKENS)
+    budget.reserve("question", f"Instructions: {_RAG_INSTRUCTIONS_FALLBACK}\nContext: \nUser question: {query}", overhead=MESSAGE_OVERHEAD_TOKENS)
+    kept_chunks = [chunk_results[i] for i in budget.fill(
+        "chunks", (f"[{idx}] {r.metadata['text']}\n" for idx, r in enumerate(chunk_results, start=1))
+    )]
+    newest_summaries = summary_messages[::-1]
+    kept_summaries = [newest_summaries[i] for i in budget.fill(
+        "summaries", (f"[S{idx}] {(m.get('content') or '').strip()}\n" for idx, m in enumerate(newest_summaries, start=1))
+    )][::-1]
+    summary_message = f"Summary of the earlier conversation:\n{conversation_summary}" if conversation_summary else ""
+    kept_conversation_summary = bool(summary_message) and bool(budget.fill(
+        "conversation_summary", [summary_message], overhead=MESSAGE_OVERHEAD_TOKENS
+    ))
+    newest_turns = recent_turns[::-1]
+    kept_turns = [newest_turns[i] for i in budget.fill(
+        "history", (m.get("content") or "" for m in newest_turns),
+        overhead=MESSAGE_OVERHEAD_TOKENS,
+        contiguous=True,
+    )][::-1]
+    logger.debug("rag prompt token usage: %s", budget.report())
+
+    context_blocks: List[str] = []
+    sources: List[dict] = []
+    for idx, r in enumerate(kept_chunks, start=1):
+        text = r.metadata["text"]
+        context_blocks.append(f"[{idx}] {text}")
+        sources.append({
+            "id": r.id,
+            "score": r.score,
+            "text": text,
+        })
+
+    summary_blocks: List[str] = []
+    for m in kept_summaries:
+        content = (m.get("content") or "").strip()
+        summary_blocks.append(content)
+        sources.append({
+            "id": f"summary-{m.get('id')}",
+            "score": 1.0,
+            "text": content,
+        })
 
     has_rag_docs = len(context_blocks) > 0
     has_summaries = len(summary_blocks) > 0
@@ -54,43 +147,20 @@ async def rag_answer(query: str, top_k: int = 10, score_threshold: float = 0.7,
                 combined_context_blocks.append(f"[S{idx}] {s}")
 
         numbered_context = "\n".join(combined_context_blocks)
-        instructions = (
-            "Small or focused questions: reply in 1–2 short sentences.\n"
-            "Bigger questions or calculation: one summary sentence, add 3-5 bullet points for clarity.\n"
-            "Do not introduce yourself."
-        )
+        instructions = _RAG_INSTRUCTIONS
         is_rag_mode = True
     else:
         numbered_context = "(No relevant legal documents or uploaded document summaries found in database)"
-        instructions = (
-            "Rely on fully knowledge of Income Tax Act 2023.\n"
-            "Small or focused questions: reply in 1–2 short sentences.\n"
-            "Bigger questions or calculation: one summary sentence, add 3-5 bullet points for clarity.\n"
-            "Do not introduce yourself."
-        )
+        instructions = _RAG_INSTRUCTIONS_FALLBACK
         is_rag_mode = False
 
-    lang = _detect_language(query)
-    target_lang_instruction = (
-        "Answer only in Bangla."
-        if lang == 'bn' else
-        "Answer only in English."
-    )
-
-    system_prompt = (
-        "You are a Senior Bangladeshi tax Advisor, expert in the Income Tax Act 2023 and current NBR rules & Regulations. "
-        "Always provide clear, concise, and practical answers in friendly manner."
-        + target_lang_instruction + " If any context or user input is in another language, translate it and always answer only in the target language.\n"
-    )
-
     messages = [{"role": "system", "content": system_prompt}]
+    if kept_conversation_summary:
+        messages.append({"role": "system", "content": summary_message})
 
-    if chat_history:
-        for m in chat_history[-30:]:
-            role = "assistant" if m.get("role") == "assistant" else "user"
-            content = m.get("content") or ""
-            if content:
-                messages.append({"role": role, "content": content})
+    for m in kept_turns:
+        role = "assistant" if m.get("role") == "assistant" else "user"
+        messages.append({"role": role, "content": m.get("content") or ""})
 
     user_prompt = (
         f"Instructions: {instructions}\n"
@@ -99,18 +169,84 @@ async def rag_answer(query: str, top_k: int = 10, score_threshold: float = 0.7,
     )
 
     messages.append({"role": "user", "content": user_prompt})
+    return _Prompt(
+        messages=messages,
+        sources=sources,
+        is_rag_mode=is_rag_mode,
+        query_emb=query_emb,
+        lang=lang,
+        source_ids=[str(r.id) for r in kept_chunks],
+        cacheable=cacheable,
+        token_usage=budget.report(),
+    )
+
+def _cache_lookup(prompt: _Prompt) -> Optional[str]:
+    if not prompt.cacheable:
+        answer_cache.record_bypass()
+        return None
+    cached = answer_cache.lookup(prompt.query_emb, lang=prompt.lang, source_ids=prompt.source_ids)
+    return cached.answer if cached else None
+
+def _cache_store(prompt: _Prompt, answer: str, started: float) -> None:
+    if prompt.cacheable:
+        answer_cache.store(
+            prompt.query_emb,
+            lang=prompt.lang,
+            source_ids=prompt.source_ids,
+            answer=answer,
+            sources=prompt.sources,
+            latency=time.perf_counter() - started,
+        )
 
+async def rag_answer(query: str, top_k: int = 10, score_threshold: float = 0.7, chat_history: Optional[List[Dict]] = None, conversation_summary: Optional[str] = None) -> Tuple[str, List[dict]]:
+    prompt = await _build_prompt(query, top_k, score_threshold, chat_history, conversation_summary)
+    cached = _cache_lookup(prompt)
+    if cached is not None:
+        return cached, prompt.sources
+
+    started = time.perf_counter()
     res = await client.chat.completions.create(
         model=GPT_MODEL,
-        messages=messages,
-        temperature=0.5 if is_rag_mode else 0.7,
+        messages=prompt.messages,
+        temperature=0.5 if prompt.is_rag_mode else 0.7,
         max_completion_tokens=800,
     )
 
-    import re
-    answer = res.choices[0].message.content
-    answer = answer.replace('—', ', ')
-    return answer, sources
+    answer = _clean_answer(res.choices[0].message.content or "")
+    _cache_store(prompt, answer, started)
+    return answer, prompt.sources
+
+async def rag_answer_stream(query: str, top_k: int = 10, score_threshold: float = 0.7, chat_history: Optional[List[Dict]] = None, conversation_summary: Optional[str] = None) -> AsyncIterator[str]:
+    prompt = await _build_prompt(query, top_k, score_threshold, chat_history, conversation_summary)
+    cached = _cache_lookup(prompt)
+    if cached is not None:
+        yield cached
+        return
 
-async def answer(query: str, top_k: int = 5, score_threshold: float = 0.5, chat_history: Optional[List[Dict]] = None) -> Tuple[str, List[dict]]:
-    return await rag_answer(query, top_k=top_k, score_threshold=score_threshold, chat_history=chat_history)
\ No newline at end of file
+    started = time.perf_counter()
+    stream = await client.chat.completions.create(
+        model=GPT_MODEL,
+        messages=prompt.messages,
+        temperature=0.5 if prompt.is_rag_mode else 0.7,
+        max_completion_tokens=800,
+        stream=True,
+    )
+    parts: List[str] = []
+    try:
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                delta = _clean_answer(delta)
+                parts.append(delta)
+                yield delta
+    finally:
+        await stream.close()
+    _cache_store(prompt, "".join(parts), started)
+
+async def answer(query: str, top_k: int = 5, score_threshold: float = 0.5, chat_history: Optional[List[Dict]] = None, conversation_summary: Optional[str] = None) -> Tuple[str, List[dict]]:
+    return await rag_answer(query, top_k=top_k, score_threshold=score_threshold, chat_history=chat_history, conversation_summary=conversation_summary)
+
+def answer_stream(query: str, top_k: int = 5, score_threshold: float = 0.5, chat_history: Optional[List[Dict]] = None, conversation_summary: Optional[str] = None) -> AsyncIterator[str]:
+    return rag_answer_stream(query, top_k=top_k, score_threshold=score_threshold, chat_history=chat_history, conversation_summary=conversation_summary)
\ No newline at end of file
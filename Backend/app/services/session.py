@@ -1,9 +1,15 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, update, delete, or_, and_
+from app.core.config import CHAT_COMPACT_AFTER, CHAT_RECENT_WINDOW
+from app.services.db import async_session
+from app.services import blobstore
+from app.services.tax_context import tax_context_cache
 from app.model.model import (
     ChatSession,
     ChatMessage,
+    ChatSummary,
     UploadedDocument,
+    UploadJob,
     NidInfo,
     TinInfo,
     SalaryInfo,
@@ -27,13 +33,22 @@ async def get_or_create_active_session(db: AsyncSession, user_id: int) -> ChatSe
     await db.refresh(new_session)
     return new_session
 
+async def _document_blobs(db: AsyncSession, session_id: str) -> list[str]:
+    result = await db.execute(
+        select(UploadedDocument.content_hash).where(UploadedDocument.session_id == session_id)
+    )
+    return list(result.scalars().all())
+
 async def terminate_active_session(db: AsyncSession, user_id: int) -> str:
     result = await db.execute(
         select(ChatSession).where(ChatSession.user_id == user_id, ChatSession.active == True)
     )
     current = result.scalars().first()
     if current:
+        blobs = await _document_blobs(db, current.id)
         await db.execute(delete(ChatMessage).where(ChatMessage.session_id == current.id))
+        await db.execute(delete(ChatSummary).where(ChatSummary.session_id == current.id))
+        await db.execute(delete(UploadJob).where(UploadJob.session_id == current.id))
         await db.execute(delete(UploadedDocument).where(UploadedDocument.session_id == current.id))
         await db.execute(delete(NidInfo).where(NidInfo.session_id == current.id))
         await db.execute(delete(TinInfo).where(TinInfo.session_id == current.id))
@@ -45,6 +60,8 @@ async def terminate_active_session(db: AsyncSession, user_id: int) -> str:
         await db.execute(delete(LoanInfo).where(LoanInfo.session_id == current.id))
         await db.execute(delete(ChatSession).where(ChatSession.id == current.id))
         await db.commit()
+        tax_context_cache.forget_session(current.id)
+        await blobstore.release(db, blobs)
     fresh = ChatSession(user_id=user_id, active=True)
     db.add(fresh)
     await db.commit()
@@ -58,7 +75,10 @@ async def delete_active_session(db: AsyncSession, user_id: int) -> bool:
     current = result.scalars().first()
     if not current:
         return False
+    blobs = await _document_blobs(db, current.id)
     await db.execute(delete(ChatMessage).where(ChatMessage.session_id == current.id))
+    await db.execute(delete(ChatSummary).where(ChatSummary.session_id == current.id))
+    await db.execute(delete(UploadJob).where(UploadJob.session_id == current.id))
     await db.execute(delete(UploadedDocument).where(UploadedDocument.session_id == current.id))
     await db.execute(delete(NidInfo).where(NidInfo.session_id == current.id))
     await db.execute(delete(TinInfo).where(TinInfo.session_id == current.id))
@@ -70,6 +90,8 @@ async def delete_active_session(db: AsyncSession, user_id: int) -> bool:
     await db.execute(delete(LoanInfo).where(LoanInfo.session_id == current.id))
     await db.execute(delete(ChatSession).where(ChatSession.id == current.id))
     await db.commit()
+    tax_context_cache.forget_session(current.id)
+    await blobstore.release(db, blobs)
     return True
 
 async def persist_message(db: AsyncSession, session_id: str, role: str, content: str, voice_transcript: str | None = None) -> int:
@@ -79,6 +101,15 @@ async def persist_message(db: AsyncSession, session_id: str, role: str, content:
     await db.refresh(msg)
     return msg.id
 
+def _message_dict(m: ChatMessage) -> dict:
+    return {
+        "id": m.id,
+        "role": m.role,
+        "content": m.content,
+        "voice_transcript": getattr(m, 'voice_transcript', None),
+        "created_at": str(m.created_at),
+    }
+
 async def fetch_history(db: AsyncSession, user_id: int) -> list[dict]:
     result = await db.execute(
         select(ChatSession).where(ChatSession.user_id == user_id, ChatSession.active == True)
@@ -92,13 +123,72 @@ async def fetch_history(db: AsyncSession, user_id: int) -> list[dict]:
         .order_by(ChatMessage.created_at.asc(), ChatMessage.id.asc())
     )
     messages = res.scalars().all()
-    return [
-        {
-            "id": m.id,
-            "role": m.role,
-            "content": m.content,
-            "voice_transcript": getattr(m, 'voice_transcript', None),
-            "created_at": str(m.created_at),
-        }
-        for m in messages
-    ]
\ No newline at end of file
+    return [_message_dict(m) for m in messages]
+
+async def fetch_chat_context(db: AsyncSession, session_id: str) -> tuple[str | None, list[dict]]:
+    record = await db.get(ChatSummary, session_id)
+    last_folded = record.last_message_id if record else 0
+    res = await db.execute(
+        select(ChatMessage)
+        .where(
+            ChatMessage.session_id == session_id,
+            or_(
+                ChatMessage.id > last_folded,
+                and_(ChatMessage.role == "assistant", ChatMessage.content.startswith("Summary:")),
+            ),
+        )
+        .order_by(ChatMessage.created_at.asc(), ChatMessage.id.asc())
+    )
+    messages = [_message_dict(m) for m in res.scalars().all()]
+    return (record.summary if record else None), messages
+
+_compacting: set[str] = set()
+
+async def compact_session(session_id: str) -> None:
+    from app.services.summary import summarize_conversation
+
+    if session_id in _compacting:
+        return
+    _compacting.add(session_id)
+    try:
+        async with async_session() as db:
+            record = await db.get(ChatSummary, session_id)
+            last_folded = record.last_message_id if record else 0
+            res = await db.execute(
+                select(ChatMessage)
+                .where(ChatMessage.session_id == session_id, ChatMessage.id > last_folded)
+                .order_by(ChatMessage.id.asc())
+            )
+            pending = res.scalars().all()
+            if len(pending) <= CHAT_COMPACT_AFTER:
+                return
+            fold = pending[:len(pending) - CHAT_RECENT_WINDOW]
+            previous_summary = record.summary if record else None
+            messages = [(m.role, m.content) for m in fold]
+            last_message_id = fold[-1].id
+            # Don't hold the read transaction open across the LLM call.
+            await db.rollback()
+            summary = await summarize_conversation(previous_summary=previous_summary, messages=messages)
+            if not summary:
+                return
+            # The session may have been terminated or deleted meanwhile; check it in the same
+            # transaction as the write so no summary outlives its session.
+            live = await db.scalar(
+                select(ChatSession.id)
+                .where(ChatSession.id == session_id, ChatSession.active == True)
+                .with_for_update()
+            )
+            if live is None:
+                return
+            record = await db.get(ChatSummary, session_id, populate_existing=True)
+            if record is None:
+                record = ChatSummary(session_id=session_id)
+                db.add(record)
+            record.summary = summary
+            record.last_message_id = last_message_id
+            try:
+                await db.commit()
+            except Exception:
+                await db.rollback()
+    finally:
+        _compacting.discard(session_id)
\ No newline at end of file
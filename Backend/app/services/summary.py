@@ -1,8 +1,14 @@
 from __future__ import annotations
+import asyncio
+import json
+import random
+import re
+from dataclasses import dataclass
 from enum import Enum
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, List, Tuple
 from openai import AsyncOpenAI
-from app.core.config import OPENAI_API_KEY, GPT_MODEL
+from app.core.config import OPENAI_API_KEY, GPT_MODEL, DOC_RULE_AUDIT_RATE, DOC_RULE_THRESHOLD
+from app.utils import doc_rules
 from app.schemas.tax_schema import (
     NIDSchema,
     TINSchema,
@@ -24,6 +30,9 @@ def _get_client() -> Optional[AsyncOpenAI]:
         _client = AsyncOpenAI(api_key=OPENAI_API_KEY)
     return _client
 
+def _clean_summary(content: str) -> str:
+    return re.sub(r"\s*[—–]\s*", ", ", content)
+
 def _detect_language(text: str) -> str:
     for ch in text:
         if 0x0980 <= ord(ch) <= 0x09FF:
@@ -74,10 +83,46 @@ async def summarize(
     content = (res.choices[0].message.content or "").strip()
     if not content:
         return None
-    
-    import re
-    content = re.sub(r"\s*[—–]\s*", ", ", content)
-    return content
+    return _clean_summary(content)
+
+
+async def summarize_conversation(
+    *,
+    previous_summary: Optional[str],
+    messages: List[Tuple[str, str]],
+) -> Optional[str]:
+    client = _get_client()
+    if client is None or not messages:
+        return None
+
+    system = (
+        "You maintain a running summary of a conversation between a user and a Bangladeshi tax assistant. "
+        "Merge the previous summary with the new turns into one updated summary. "
+        "Keep every figure, date, document detail and open question the user raised; drop greetings and repetition. "
+        "Write in the language most of the conversation uses, in at most 10 short bullet points."
+    )
+
+    transcript = "\n".join(f"{role}: {content}" for role, content in messages if content)
+    prompt = (
+        f"Previous summary:\n{previous_summary or '(none)'}\n\n"
+        f"New turns:\n{transcript}"
+    )
+
+    try:
+        res = await client.chat.completions.create(
+            model=GPT_MODEL,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0.2,
+            max_completion_tokens=600,
+        )
+    except Exception:
+        return None
+
+    content = (res.choices[0].message.content or "").strip()
+    return content or None
 
 
 class DocType(str, Enum):
@@ -102,12 +147,54 @@ SCHEMAS: Dict[DocType, Any] = {
     DocType.LOAN: LoanSchema,
 }
 
+EXAMPLE_JSONS: Dict[DocType, str] = {
+    DocType.SALARY: '{"employer_name": "Desco Ltd", "basic_pay": 1000, "house_rent": 100, "medical": 100, "festival_bonus": 100, "conveyance": 100}',
+    DocType.NID: '{"name": "Jack", "nid_number": "12334567889", "date_of_birth": "1990-01-01"}',
+    DocType.TIN: '{"tin_number": "123456789912", "tax_zone": "Dhaka", "tax_circle": "01"}',
+    DocType.BANK: '{"interest_income": 200, "bank_balance": 5000}',
+    DocType.INSURANCE: '{"life_insurance_premium": 150}',
+    DocType.DPS: '{"dps_contribution": 300}',
+    DocType.SANCHAYPATRA: '{"sanchaypatra_investment": 250}',
+    DocType.LOAN: '{"loan_outstanding": 5000}',
+}
+
 
 async def identify_document_type(raw_text: str) -> DocType:
     cleaned = (raw_text or "").strip()
     if not cleaned:
         return DocType.UNKNOWN
 
+    rule = doc_rules.classify(cleaned)
+    if rule.confidence >= DOC_RULE_THRESHOLD:
+        doc_rules.agreement.record_rule_only()
+        _maybe_audit(rule, cleaned)
+        return DocType(rule.label)
+
+    doc_type = await _identify_with_llm(cleaned)
+    if doc_type != DocType.UNKNOWN:
+        doc_rules.agreement.record(rule, doc_type.value)
+    return doc_type
+
+
+_audits: set[asyncio.Task] = set()
+
+
+def _maybe_audit(rule: doc_rules.RuleMatch, cleaned: str) -> None:
+    # A sample of rule-only decisions is checked against the model off the request path.
+    if random.random() >= DOC_RULE_AUDIT_RATE or _get_client() is None:
+        return
+
+    async def audit() -> None:
+        doc_type = await _identify_with_llm(cleaned)
+        if doc_type != DocType.UNKNOWN:
+            doc_rules.agreement.record(rule, doc_type.value, audit=True)
+
+    task = asyncio.create_task(audit())
+    _audits.add(task)
+    task.add_done_callback(_audits.discard)
+
+
+async def _identify_with_llm(cleaned: str) -> DocType:
     client = _get_client()
     if client is None:
         return DocType.UNKNOWN
@@ -170,17 +257,7 @@ async def extract_structured_data(raw_text: str, doc_type: DocType) -> Optional[
         "Output must be valid JSON."
     )
 
-    example_jsons = {
-        DocType.SALARY: '{"employer_name": "Desco Ltd", "basic_pay": 1000, "house_rent": 100, "medical": 100, "festival_bonus": 100, "conveyance": 100}',
-        DocType.NID: '{"name": "Jack", "nid_number": "12334567889", "date_of_birth": "1990-01-01"}',
-        DocType.TIN: '{"tin_number": "123456789912", "tax_zone": "Dhaka", "tax_circle": "01"}',
-        DocType.BANK: '{"interest_income": 200, "bank_balance": 5000}',
-        DocType.INSURANCE: '{"life_insurance_premium": 150}',
-        DocType.DPS: '{"dps_contribution": 300}',
-        DocType.SANCHAYPATRA: '{"sanchaypatra_investment": 250}',
-        DocType.LOAN: '{"loan_outstanding": 5000}',
-    }
-    example = example_jsons.get(doc_type, "{}")
+    example = EXAMPLE_JSONS.get(doc_type, "{}")
 
     user = (
         f"Document type: {doc_type.value}.\n"
@@ -208,4 +285,108 @@ async def extract_structured_data(raw_text: str, doc_type: DocType) -> Optional[
         data = model_cls.model_validate_json(content)
     except Exception:
         return None
-    return data.model_dump()
\ No newline at end of file
+    return data.model_dump()
+
+
+@dataclass
+class DocumentAnalysis:
+    doc_type: DocType
+    data: Optional[Dict[str, Any]]
+    summary: Optional[str]
+
+
+async def _analyze_single_pass(
+    filename: str,
+    cleaned: str,
+    doc_type: Optional[DocType] = None,
+) -> Optional[Dict[str, Any]]:
+    client = _get_client()
+    if client is None:
+        return None
+
+    target_lang = "Bangla" if _detect_language(cleaned) == "bn" else "English"
+    known = [doc_type] if doc_type in SCHEMAS else list(SCHEMAS)
+    schemas = "\n".join(
+        f"- {dt.value}: {EXAMPLE_JSONS.get(dt, '{}')}" for dt in known
+    )
+    if doc_type in SCHEMAS:
+        type_line = f'"doc_type" is "{doc_type.value}".\n'
+    else:
+        type_line = f'"doc_type" is one of: {", ".join(dt.value for dt in DocType)}. Use "unknown" if you are not sure.\n'
+    system = (
+        "You read Bangladeshi tax-related documents for a tax assistant app. "
+        "Classify the document, extract its fields and summarize it in one JSON object. "
+        "Be factual and do not invent data. "
+        "Output must be valid JSON."
+    )
+    user = (
+        f"File: {filename}\n"
+        'Return a JSON object with exactly these keys: "doc_type", "fields", "summary".\n'
+        f"{type_line}"
+        '"fields" has exactly the fields of that type, as in these examples; use {} for unknown. '
+        "If a value is missing, use 0.0 for numbers and empty string for text. "
+        "All field values must be in English, even if the document is in Bangla.\n"
+        f"{schemas}\n"
+        f'"summary" is a concise summary with bullet points, 4-5 sentences maximum, written only in {target_lang}.\n'
+        f"Document text:\n{cleaned}"
+    )
+
+    try:
+        resp = await client.chat.completions.create(
+            model=GPT_MODEL,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": user},
+            ],
+            temperature=0,
+            response_format={"type": "json_object"},
+            max_completion_tokens=1600,
+        )
+        payload = json.loads(resp.choices[0].message.content or "")
+    except Exception:
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+async def analyze_document(*, filename: str, text: str) -> DocumentAnalysis:
+    cleaned = (text or "").strip()
+    if not cleaned:
+        return DocumentAnalysis(DocType.UNKNOWN, None, None)
+
+    rule = doc_rules.classify(cleaned)
+    ruled = DocType(rule.label) if rule.confidence >= DOC_RULE_THRESHOLD else None
+    payload = await _analyze_single_pass(filename, cleaned, ruled) or {}
+
+    doc_type: Optional[DocType] = ruled
+    if ruled is not None:
+        doc_rules.agreement.record_rule_only()
+        _maybe_audit(rule, cleaned)
+    else:
+        try:
+            doc_type = DocType(str(payload.get("doc_type", "")).strip().lower())
+        except ValueError:
+            doc_type = None
+        if doc_type is not None and doc_type != DocType.UNKNOWN:
+            doc_rules.agreement.record(rule, doc_type.value)
+
+    data = None
+    if doc_type is not None and doc_type in SCHEMAS:
+        try:
+            data = SCHEMAS[doc_type].model_validate(payload.get("fields")).model_dump()
+        except Exception:
+            data = None
+
+    summary = payload.get("summary")
+    summary = _clean_summary(summary.strip()) if isinstance(summary, str) and summary.strip() else None
+
+    # Only the parts that failed validation go back through the dedicated calls.
+    if doc_type is None:
+        doc_type = await identify_document_type(cleaned)
+    if data is None and doc_type in SCHEMAS:
+        data = await extract_structured_data(cleaned, doc_type)
+    if summary is None:
+        try:
+            summary = await summarize(filename=filename, text=cleaned)
+        except Exception:
+            summary = None
+    return DocumentAnalysis(doc_type, data, summary)
@@ -0,0 +1,113 @@
+from __future__ import annotations
+import copy
+import hashlib
+import itertools
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import TAX_CONTEXT_CACHE_MAX_ITEMS, TAX_CONTEXT_CACHE_TTL
+from app.utils.cache import LRUCache
+from app.utils.tax_calculate import build_tax_return_context
+
+
+# An entry is valid only while the user's and the session's version stamps are unchanged.
+# Stamps come from one counter and are never reused, and a key seen for the first time gets a
+# fresh one, so dropping a key (LRU trim or forget_session) can only invalidate entries.
+class TaxContextCache:
+    def __init__(self, *, max_items: int, ttl: float):
+        self._entries = LRUCache(max_items=max_items, ttl=ttl)
+        # Each entry is checked against one user and one session key.
+        self._max_versions = 2 * max_items
+        self._versions: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _touch(self, key: Hashable, *, bump: bool = False) -> int:
+        version = self._versions.get(key)
+        if version is None or bump:
+            version = next(self._counter)
+        self._versions[key] = version
+        self._versions.move_to_end(key)
+        while len(self._versions) > self._max_versions:
+            self._versions.popitem(last=False)
+        return version
+
+    def stamp(self, user_id: int, session_id: str) -> Tuple[int, int]:
+        with self._lock:
+            return self._touch(("user", user_id)), self._touch(("session", session_id))
+
+    def _bump(self, key: Hashable) -> None:
+        with self._lock:
+            self._touch(key, bump=True)
+            self.invalidations += 1
+
+    def bump_user(self, user_id: int) -> None:
+        self._bump(("user", user_id))
+
+    def bump_session(self, session_id: str) -> None:
+        self._bump(("session", session_id))
+
+    def forget_session(self, session_id: str) -> None:
+        # Session ids are never reused, so the ended session's stamp and entries can simply go.
+        with self._lock:
+            self._versions.pop(("session", session_id), None)
+            self.invalidations += 1
+        for key, _entry in self._entries.items():
+            if key[1] == session_id:
+                self._entries.pop(key)
+
+    def get(self, key: Hashable, stamp: Tuple[int, int]) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != stamp:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return copy.deepcopy(entry[1])
+
+    def put(self, key: Hashable, stamp: Tuple[int, int], context: Dict[str, Any]) -> None:
+        self._entries.set(key, (stamp, copy.deepcopy(context)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "items": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "versions": len(self._versions),
+        }
+
+
+tax_context_cache = TaxContextCache(max_items=TAX_CONTEXT_CACHE_MAX_ITEMS, ttl=TAX_CONTEXT_CACHE_TTL)
+
+
+def _overrides_hash(overrides: Optional[Dict[str, Any]]) -> str:
+    raw = json.dumps(overrides or {}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+async def get_tax_return_context(
+    *,
+    db: AsyncSession,
+    user_id: int,
+    session_id: str,
+    overrides: Optional[Dict[str, Any]] = None,
+    allow_llm: bool = True,
+) -> Dict[str, Any]:
+    key = (user_id, session_id, _overrides_hash(overrides), allow_llm)
+    # Read the stamp before loading so a write that lands mid-build leaves this entry stale.
+    stamp = tax_context_cache.stamp(user_id, session_id)
+    context = tax_context_cache.get(key, stamp)
+    if context is not None:
+        return context
+    context = await build_tax_return_context(
+        db=db, user_id=user_id, session_id=session_id, overrides=overrides, allow_llm=allow_llm
+    )
+    tax_context_cache.put(key, stamp, context)
+    return context
@@ -0,0 +1,63 @@
+from __future__ import annotations
+from dataclasses import dataclass, fields
+from typing import Dict, Optional
+
+from sqlalchemy import func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.model.model import (
+    BankInfo,
+    DpsInfo,
+    InsuranceInfo,
+    LoanInfo,
+    NidInfo,
+    SalaryInfo,
+    SanchaypatraInfo,
+    TinInfo,
+    User,
+)
+
+
+@dataclass(slots=True)
+class SessionTaxSnapshot:
+    user: Optional[User]
+    nid: Optional[NidInfo]
+    tin: Optional[TinInfo]
+    salary: Optional[SalaryInfo]
+    bank: Optional[BankInfo]
+    insurance: Optional[InsuranceInfo]
+    dps: Optional[DpsInfo]
+    sanchaypatra: Optional[SanchaypatraInfo]
+    loan: Optional[LoanInfo]
+
+    def present(self) -> Dict[str, bool]:
+        return {f.name: getattr(self, f.name) is not None for f in fields(self) if f.name != "user"}
+
+
+_INFO_MODELS = (
+    NidInfo,
+    TinInfo,
+    SalaryInfo,
+    BankInfo,
+    InsuranceInfo,
+    DpsInfo,
+    SanchaypatraInfo,
+    LoanInfo,
+)
+
+
+async def load_session_snapshot(db: AsyncSession, user_id: int, session_id: str) -> SessionTaxSnapshot:
+    # One row: a constant anchor outer-joined to the user and to the first row of every info table.
+    anchor = select(literal(1).label("one")).subquery()
+    stmt = select(User, *_INFO_MODELS).select_from(anchor).outerjoin(User, User.id == user_id)
+    for model_cls in _INFO_MODELS:
+        inner = aliased(model_cls)
+        first_id = (
+            select(func.min(inner.id))
+            .where(inner.user_id == user_id, inner.session_id == session_id)
+            .scalar_subquery()
+        )
+        stmt = stmt.outerjoin(model_cls, model_cls.id == first_id)
+    row = (await db.execute(stmt)).one()
+    return SessionTaxSnapshot(*row)
@@ -0,0 +1,331 @@
+from __future__ import annotations
+import asyncio
+import json
+import os
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import VECTOR_BACKEND, VECTOR_INDEX_DIR, VECTOR_IVF_LISTS, VECTOR_IVF_PROBES
+
+
+@dataclass
+class VectorMatch:
+    id: str
+    score: float
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+class VectorStore(ABC):
+    # Local stores answer in-process; remote ones are pushed off the event loop.
+    in_process: bool = False
+
+    @abstractmethod
+    def upsert_many(self, items: List[Dict[str, Any]]) -> List[str]:
+        ...
+
+    @abstractmethod
+    def search(self, embedding: List[float], top_k: int = 10) -> List[Any]:
+        ...
+
+    @abstractmethod
+    def delete_many(self, ids: List[str]) -> None:
+        ...
+
+    def flush(self) -> None:
+        # Stores that write through have nothing to persist.
+        pass
+
+
+class PineconeVectorStore(VectorStore):
+    batch_size = 100
+
+    def upsert_many(self, items: List[Dict[str, Any]]) -> List[str]:
+        from app.services.pinecone import get_or_create_index
+
+        index = get_or_create_index()
+        for start in range(0, len(items), self.batch_size):
+            index.upsert(vectors=items[start:start + self.batch_size])
+        return [item["id"] for item in items]
+
+    def search(self, embedding: List[float], top_k: int = 10) -> List[Any]:
+        from app.services.pinecone import search_index
+
+        return search_index(embedding, top_k)
+
+    def delete_many(self, ids: List[str]) -> None:
+        from app.services.pinecone import get_or_create_index
+
+        index = get_or_create_index()
+        for start in range(0, len(ids), 1000):
+            index.delete(ids=ids[start:start + 1000])
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _grown(buffer: np.ndarray, used: int, rows: int, tail: tuple, dtype) -> np.ndarray:
+    # Doubling capacity keeps appends amortized O(1); a read-only (memory-mapped) buffer is copied once.
+    if buffer.flags.writeable and buffer.shape[0] >= rows and buffer.shape[1:] == tail:
+        return buffer
+    grown = np.zeros((max(rows, 2 * buffer.shape[0], 64), *tail), dtype=dtype)
+    if used:
+        grown[:used] = buffer[:used]
+    return grown
+
+
+class LocalVectorStore(VectorStore):
+    in_process = True
+
+    VECTORS_FILE = "vectors.npy"
+    META_FILE = "meta.json"
+    IVF_FILE = "ivf.npz"
+
+    def __init__(self, path: str, *, ivf_lists: int = 0, ivf_probes: int = 8):
+        self.path = path
+        self.ivf_lists = ivf_lists
+        self.ivf_probes = max(1, ivf_probes)
+        self._lock = threading.RLock()
+        self._ids: List[str] = []
+        self._meta: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        # Rows live in the head of _buffer, which grows by doubling so appends stay amortized O(1).
+        self._buffer: np.ndarray = np.zeros((0, 0), dtype=np.float32)
+        self._matrix: np.ndarray = self._buffer
+        self._centroids: Optional[np.ndarray] = None
+        self._assign: Optional[np.ndarray] = None
+        self._assign_buffer: np.ndarray = np.zeros(0, dtype=np.int32)
+        self._trained_on = 0
+        self._dirty = False
+        self._stamp: Optional[int] = None
+        self._load()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _current_stamp(self) -> Optional[int]:
+        try:
+            return os.stat(self._file(self.META_FILE)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self) -> None:
+        stamp = self._current_stamp()
+        self._stamp = stamp
+        self._dirty = False
+        if stamp is None:
+            return
+        with open(self._file(self.META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self._ids = list(meta.get("ids") or [])
+        self._meta = list(meta.get("metadata") or [])
+        self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        self._trained_on = int(meta.get("trained_on") or 0)
+        # Memory-mapped and read-only until the first write copies it into the buffer.
+        self._buffer = np.load(self._file(self.VECTORS_FILE), mmap_mode="r")
+        self._matrix = self._buffer
+        self._centroids = None
+        self._assign = None
+        if os.path.exists(self._file(self.IVF_FILE)):
+            with np.load(self._file(self.IVF_FILE)) as ivf:
+                if len(ivf["assign"]) == len(self._ids):
+                    self._centroids = ivf["centroids"]
+                    self._assign = ivf["assign"]
+        self._assign_buffer = self._assign if self._assign is not None else np.zeros(0, dtype=np.int32)
+
+    def _maybe_reload(self) -> None:
+        if not self._dirty and self._current_stamp() != self._stamp:
+            self._load()
+
+    def _write_atomic(self, name: str, write) -> None:
+        tmp = self._file(name + ".tmp")
+        with open(tmp, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._file(name))
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(self.path, exist_ok=True)
+            matrix = self._matrix
+            self._write_atomic(self.VECTORS_FILE, lambda f: np.save(f, matrix))
+            if self._centroids is not None and self._assign is not None:
+                centroids, assign = self._centroids, self._assign
+                self._write_atomic(self.IVF_FILE, lambda f: np.savez(f, centroids=centroids, assign=assign))
+            elif os.path.exists(self._file(self.IVF_FILE)):
+                os.remove(self._file(self.IVF_FILE))
+            payload = {"ids": self._ids, "metadata": self._meta, "trained_on": self._trained_on}
+            self._write_atomic(
+                self.META_FILE,
+                lambda f: f.write(json.dumps(payload, ensure_ascii=False).encode("utf-8")),
+            )
+            self._stamp = self._current_stamp()
+            self._dirty = False
+
+    def _train_ivf(self) -> None:
+        n = len(self._ids)
+        lists = min(self.ivf_lists, n // 8)
+        if lists < 2:
+            self._centroids = None
+            self._assign = None
+            return
+        matrix = np.asarray(self._matrix)
+        rng = np.random.default_rng(0)
+        centroids = matrix[rng.choice(n, size=lists, replace=False)].copy()
+        assign = np.zeros(n, dtype=np.int32)
+        for _ in range(10):
+            assign = np.argmax(matrix @ centroids.T, axis=1).astype(np.int32)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, matrix)
+            filled = np.bincount(assign, minlength=lists) > 0
+            centroids[filled] = _normalize_rows(sums[filled])
+        self._centroids = centroids.astype(np.float32)
+        self._assign = self._assign_buffer = assign
+        self._trained_on = n
+
+    def upsert_many(self, items: List[Dict[str, Any]]) -> List[str]:
+        # Changes stay in memory until flush(); ingest persists once per file.
+        if not items:
+            return []
+        vectors = _normalize_rows(np.asarray([item["values"] for item in items], dtype=np.float32))
+
+        with self._lock:
+            self._maybe_reload()
+            dim = vectors.shape[1]
+            if len(self._ids) and self._matrix.shape[1] != dim:
+                raise ValueError(f"Embedding dimension {dim} does not match index dimension {self._matrix.shape[1]}")
+
+            start = len(self._ids)
+            rows: List[int] = []
+            for item in items:
+                doc_id = str(item["id"])
+                row = self._rows.get(doc_id)
+                if row is None:
+                    row = len(self._ids)
+                    self._rows[doc_id] = row
+                    self._ids.append(doc_id)
+                    self._meta.append(dict(item.get("metadata") or {}))
+                else:
+                    self._meta[row] = dict(item.get("metadata") or {})
+                rows.append(row)
+
+            n = len(self._ids)
+            self._buffer = _grown(self._buffer, start, n, (dim,), np.float32)
+            self._buffer[rows] = vectors
+            self._matrix = self._buffer[:n]
+
+            if self.ivf_lists > 0 and (self._centroids is None or n >= 2 * self._trained_on):
+                self._train_ivf()
+            elif self._centroids is not None and self._assign is not None:
+                self._assign_buffer = _grown(self._assign_buffer, start, n, (), np.int32)
+                self._assign_buffer[rows] = np.argmax(vectors @ self._centroids.T, axis=1)
+                self._assign = self._assign_buffer[:n]
+
+            self._dirty = True
+        return [str(item["id"]) for item in items]
+
+    def delete_many(self, ids: List[str]) -> None:
+        with self._lock:
+            self._maybe_reload()
+            drop = {self._rows[str(doc_id)] for doc_id in ids if str(doc_id) in self._rows}
+            if not drop:
+                return
+            keep = np.array([row for row in range(len(self._ids)) if row not in drop], dtype=np.int64)
+            dim = self._matrix.shape[1]
+            self._buffer = np.asarray(self._matrix)[keep] if len(keep) else np.zeros((0, dim), dtype=np.float32)
+            self._matrix = self._buffer
+            self._ids = [self._ids[row] for row in keep.tolist()]
+            self._meta = [self._meta[row] for row in keep.tolist()]
+            self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+            if self._assign is not None:
+                self._assign = self._assign_buffer = self._assign[keep]
+            self._dirty = True
+
+    def search(self, embedding: List[float], top_k: int = 10) -> List[VectorMatch]:
+        with self._lock:
+            self._maybe_reload()
+            matrix, ids, meta = self._matrix, self._ids, self._meta
+            centroids, assign = self._centroids, self._assign
+
+        if not ids or top_k <= 0:
+            return []
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if norm > 0:
+            query = query / norm
+
+        candidates: Optional[np.ndarray] = None
+        if centroids is not None and assign is not None:
+            probes = min(self.ivf_probes, len(centroids))
+            nearest = np.argpartition(-(centroids @ query), probes - 1)[:probes]
+            candidates = np.flatnonzero(np.isin(assign, nearest))
+            scores = matrix[candidates] @ query
+        else:
+            scores = matrix @ query
+
+        k = min(top_k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        rows = candidates[top] if candidates is not None else top
+        return [
+            VectorMatch(id=ids[row], score=float(scores[pos]), metadata=meta[row])
+            for pos, row in zip(top.tolist(), rows.tolist())
+        ]
+
+
+_store: Optional[VectorStore] = None
+
+
+def get_vector_store() -> VectorStore:
+    global _store
+    if _store is None:
+        if VECTOR_BACKEND == "local":
+            _store = LocalVectorStore(VECTOR_INDEX_DIR, ivf_lists=VECTOR_IVF_LISTS, ivf_probes=VECTOR_IVF_PROBES)
+        elif VECTOR_BACKEND == "pinecone":
+            _store = PineconeVectorStore()
+        else:
+            raise ValueError(f"Unknown VECTOR_BACKEND: {VECTOR_BACKEND}")
+    return _store
+
+
+async def upsert_many(items: List[Dict[str, Any]]) -> List[str]:
+    return await asyncio.to_thread(get_vector_store().upsert_many, items)
+
+
+async def delete_many(ids: List[str]) -> None:
+    if ids:
+        await asyncio.to_thread(get_vector_store().delete_many, list(ids))
+
+
+async def flush() -> None:
+    await asyncio.to_thread(get_vector_store().flush)
+
+
+async def upsert(text: str, embedding: List[float], metadata: Optional[dict] = None, doc_id: Optional[str] = None) -> str:
+    item = {
+        "id": doc_id or str(uuid.uuid4()),
+        "values": embedding,
+        "metadata": {"text": text, **(metadata or {})},
+    }
+    ids = await upsert_many([item])
+    await flush()
+    return ids[0]
+
+
+async def search(embedding: List[float], top_k: int = 10) -> List[Any]:
+    store = get_vector_store()
+    if store.in_process:
+        return store.search(embedding, top_k)
+    return await asyncio.to_thread(store.search, embedding, top_k)
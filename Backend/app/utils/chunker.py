@@ -1,20 +1,95 @@
-from typing import List
+import re
+from typing import Iterable, List, Tuple
+
+from app.core.config import MODEL_NAME
+from app.utils.cleaner import split_paragraphs
+from app.utils.tokens import get_encoder
+
+# Top-level sections ("12.") start a new chunk once the current one is big enough.
+_SECTION_RE = re.compile(r'^\d+\.')
+_SENTENCE_RE = re.compile(r'(?<=[.;:!?।])\s+')
+
+class Chunker:
+    def __init__(self, min_tokens: int = 400, max_tokens: int = 800, overlap: float = 0.15):
+        self.min_tokens = min_tokens
+        self.max_tokens = max(min_tokens, max_tokens)
+        self.overlap_tokens = int(self.max_tokens * overlap)
+        self.encoder = get_encoder(MODEL_NAME)
+        self._parts: List[str] = []
+        self._size = 0
+
+    def _counts(self, texts: List[str]) -> List[int]:
+        if not texts:
+            return []
+        return [len(t) for t in self.encoder.encode_batch(texts, disallowed_special=())]
+
+    def _flush(self) -> List[str]:
+        if not self._parts:
+            return []
+        chunk = "\n".join(self._parts)
+        self._parts, self._size = [], 0
+        return [chunk]
+
+    def _split_long(self, paragraph: str) -> List[str]:
+        sentences = [s for s in _SENTENCE_RE.split(paragraph) if s]
+        chunks: List[str] = []
+        window: List[Tuple[str, int]] = []
+        size = 0
+        for sentence, n in zip(sentences, self._counts(sentences)):
+            if n > self.max_tokens:
+                if window:
+                    chunks.append(" ".join(s for s, _ in window))
+                    window, size = [], 0
+                chunks.extend(self._split_tokens(sentence))
+                continue
+            if window and size + n + 1 > self.max_tokens:
+                chunks.append(" ".join(s for s, _ in window))
+                carried: List[Tuple[str, int]] = []
+                kept = 0
+                for s, k in reversed(window):
+                    if kept + k > self.overlap_tokens:
+                        break
+                    carried.insert(0, (s, k))
+                    kept += k + 1
+                window, size = carried, kept
+            window.append((sentence, n))
+            size += n + 1
+        if window:
+            chunks.append(" ".join(s for s, _ in window))
+        return chunks
+
+    def _split_tokens(self, text: str) -> List[str]:
+        # Only reached for a single sentence longer than a whole chunk.
+        tokens = self.encoder.encode(text, disallowed_special=())
+        step = max(1, self.max_tokens - self.overlap_tokens)
+        return [
+            self.encoder.decode(tokens[start:start + self.max_tokens])
+            for start in range(0, max(1, len(tokens) - self.overlap_tokens), step)
+        ]
+
+    def feed(self, paragraphs: Iterable[str]) -> List[str]:
+        paragraphs = [p for p in paragraphs if p and p.strip()]
+        chunks: List[str] = []
+        for paragraph, n in zip(paragraphs, self._counts(paragraphs)):
+            if n > self.max_tokens:
+                chunks.extend(self._flush())
+                chunks.extend(self._split_long(paragraph))
+                continue
+            if self._parts and (
+                self._size + n + 1 > self.max_tokens
+                or (self._size >= self.min_tokens and _SECTION_RE.match(paragraph))
+            ):
+                chunks.extend(self._flush())
+            self._parts.append(paragraph)
+            self._size += n + (1 if len(self._parts) > 1 else 0)
+        return chunks
+
+    def close(self) -> List[str]:
+        return self._flush()
+
+def chunk_paragraphs(paragraphs: Iterable[str], min_tokens: int = 400, max_tokens: int = 800, overlap: float = 0.15) -> List[str]:
+    chunker = Chunker(min_tokens, max_tokens, overlap)
+    return chunker.feed(paragraphs) + chunker.close()
 
 def hierarchical_chunk(text: str, min_tokens: int = 400, max_completion_tokens: int = 1200, overlap: float = 0.15) -> List[str]:
-    import tiktoken
-    enc = tiktoken.get_encoding("cl100k_base")
-    tokens = enc.encode(text)
-    n = len(tokens)
-    chunks = []
-    start = 0
-    chunk_size = max(min_tokens, min(max_completion_tokens, 800))
-    overlap_size = int(chunk_size * overlap)
-    while start < n:
-        end = min(start + chunk_size, n)
-        chunk_tokens = tokens[start:end]
-        chunk = enc.decode(chunk_tokens)
-        chunks.append(chunk)
-        if end == n:
-            break
-        start = end - overlap_size
-    return chunks
\ No newline at end of file
+    return chunk_paragraphs(split_paragraphs(text), min_tokens, max_completion_tokens, overlap)
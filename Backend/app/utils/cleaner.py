@@ -1,37 +1,51 @@
 import re
-from typing import List
+from typing import Iterable, Iterator, List, Optional
 
-def split_paragraphs(text: str) -> List[str]:
-    lines = text.splitlines()
-    cleaned_paragraphs = []
-    buffer = "" 
-    section_pattern = re.compile(r'^(\d+\.|[\(\[]\w+[\)\]]|\*+)')
-    garbage_pattern = re.compile(r'[†‡¶¨³µÅÖ]')
-    header_pattern = re.compile(
-        r'(Government of the People|National Board of Revenue|NOTIFICATION|S\.R\.O No|Dated:|Authentic English Text)',
-        re.IGNORECASE
-    )
+section_pattern = re.compile(r'^(\d+\.|[\(\[]\w+[\)\]]|\*+)')
+garbage_pattern = re.compile(r'[†‡¶¨³µÅÖ]')
+header_pattern = re.compile(
+    r'(Government of the People|National Board of Revenue|NOTIFICATION|S\.R\.O No|Dated:|Authentic English Text)',
+    re.IGNORECASE
+)
 
-    for line in lines:
+class ParagraphSplitter:
+    def __init__(self):
+        self.buffer = ""
+
+    def feed(self, line: str) -> Optional[str]:
         line = line.strip()
-        if not line: continue
-        if re.fullmatch(r'\d{1,6}', line): continue
-        if garbage_pattern.search(line): continue
-        if header_pattern.search(line): continue
-        if re.match(r'^\d+\s+The words.*substituted', line): continue
+        if not line: return None
+        if re.fullmatch(r'\d{1,6}', line): return None
+        if garbage_pattern.search(line): return None
+        if header_pattern.search(line): return None
+        if re.match(r'^\d+\s+The words.*substituted', line): return None
         if section_pattern.match(line):
-            if buffer:
-                cleaned_paragraphs.append(buffer)
-            buffer = line
-        else:
-            if buffer:
-                if buffer.endswith('-'):
-                    buffer = buffer[:-1] + line 
-                else:
-                    buffer += " " + line
+            done = self.buffer or None
+            self.buffer = line
+            return done
+        if self.buffer:
+            if self.buffer.endswith('-'):
+                self.buffer = self.buffer[:-1] + line
             else:
-                buffer = line
-   
-    if buffer:
-        cleaned_paragraphs.append(buffer)
-    return cleaned_paragraphs
+                self.buffer += " " + line
+        else:
+            self.buffer = line
+        return None
+
+    def close(self) -> Optional[str]:
+        done = self.buffer or None
+        self.buffer = ""
+        return done
+
+def iter_paragraphs(lines: Iterable[str]) -> Iterator[str]:
+    splitter = ParagraphSplitter()
+    for line in lines:
+        paragraph = splitter.feed(line)
+        if paragraph:
+            yield paragraph
+    paragraph = splitter.close()
+    if paragraph:
+        yield paragraph
+
+def split_paragraphs(text: str) -> List[str]:
+    return list(iter_paragraphs(text.splitlines()))
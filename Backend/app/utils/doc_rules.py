@@ -0,0 +1,135 @@
+from __future__ import annotations
+import logging
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Pattern, Tuple
+
+logger = logging.getLogger(__name__)
+
+# label -> (pattern, weight). Labels are DocType values; strong identifiers weigh 3.
+_RAW_RULES: Dict[str, List[Tuple[str, float]]] = {
+    "nid": [
+        (r"national\s+id(entity)?(\s+card)?", 3),
+        (r"জাতীয়\s*পরিচয়\s*পত্র", 3),
+        (r"election\s+commission|নির্বাচন\s*কমিশন", 2),
+        (r"\bNID\b", 2),
+        (r"date\s+of\s+birth|জন্ম\s*তারিখ", 1),
+        (r"father|mother|পিতা|মাতা", 1),
+    ],
+    "tin": [
+        (r"\be-?TIN\b", 3),
+        (r"tax\s*payer'?s?\s+identification\s+number|করদাতা\s*শনাক্তকরণ", 3),
+        (r"tax\s+(zone|circle)|কর\s*(অঞ্চল|সার্কেল)", 2),
+        (r"\bTIN\b", 2),
+        (r"national\s+board\s+of\s+revenue|জাতীয়\s*রাজস্ব\s*বোর্ড", 1),
+    ],
+    "salary": [
+        (r"salary\s+certificate|pay\s*slip|বেতন\s*সনদ", 3),
+        (r"basic\s+(pay|salary)|মূল\s*বেতন", 3),
+        (r"house\s+rent|বাড়ি\s*ভাড়া", 2),
+        (r"festival\s+bonus|উৎসব\s*ভাতা", 2),
+        (r"conveyance|medical\s+allowance|চিকিৎসা\s*ভাতা", 1),
+    ],
+    "bank": [
+        (r"bank\s+statement|statement\s+of\s+account|ব্যাংক\s*বিবরণী", 3),
+        (r"account\s+(no|number)|হিসাব\s*নম্বর", 2),
+        (r"(opening|closing|available)\s+balance", 2),
+        (r"interest|সুদ", 1),
+        (r"withdrawal|deposit|debit|credit", 1),
+    ],
+    "insurance": [
+        (r"life\s+insurance|জীবন\s*বীমা", 3),
+        (r"policy\s+(no|number|holder)", 2),
+        (r"premium|প্রিমিয়াম|বীমা", 2),
+    ],
+    "dps": [
+        (r"\bDPS\b", 3),
+        (r"deposit\s+pension\s+scheme", 3),
+        (r"monthly\s+instal?ment|মাসিক\s*কিস্তি", 1),
+    ],
+    "sanchaypatra": [
+        (r"sanchaya?\s*patra|savings?\s+certificate|সঞ্চয়\s*পত্র", 3),
+        (r"national\s+savings|জাতীয়\s*সঞ্চয়", 2),
+    ],
+    "loan": [
+        (r"loan\s+(account|statement|outstanding)|outstanding\s+(balance|principal)", 3),
+        (r"\bEMI\b|ঋণ", 2),
+    ],
+}
+
+# Total weight a label needs before its margin counts in full; more than any one rule carries.
+MIN_EVIDENCE = 5.0
+
+# Bangla "য়" has two encodings; NFC on both sides makes them compare equal.
+_RULES: Dict[str, List[Tuple[Pattern[str], float]]] = {
+    label: [(re.compile(unicodedata.normalize("NFC", p), re.IGNORECASE), w) for p, w in rules]
+    for label, rules in _RAW_RULES.items()
+}
+
+
+@dataclass
+class RuleMatch:
+    label: str
+    confidence: float
+    scores: Dict[str, float] = field(default_factory=dict)
+
+
+def classify(text: str) -> RuleMatch:
+    normalized = unicodedata.normalize("NFC", text or "")
+    scores = {
+        label: sum(weight for pattern, weight in rules if pattern.search(normalized))
+        for label, rules in _RULES.items()
+    }
+    ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+    (label, top), (_, second) = ranked[0], ranked[1]
+    if top <= 0:
+        return RuleMatch("unknown", 0.0, scores)
+    # A clear margin over the runner-up, scaled down until there is at least MIN_EVIDENCE worth
+    # of matches, so a single strong keyword on its own never clears the threshold.
+    confidence = (top - second) / (top + 1) * min(1.0, top / MIN_EVIDENCE)
+    return RuleMatch(label, round(confidence, 3), scores)
+
+
+class AgreementStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rule_only = 0
+        self.compared = 0
+        self.agreed = 0
+        self.audited = 0
+        self.audit_agreed = 0
+
+    def record_rule_only(self) -> None:
+        with self._lock:
+            self.rule_only += 1
+
+    def record(self, rule: RuleMatch, llm_label: str, *, audit: bool = False) -> None:
+        # Audits re-check confident rule-only decisions, so they are counted apart.
+        agreed = rule.label == llm_label
+        with self._lock:
+            if audit:
+                self.audited += 1
+                self.audit_agreed += int(agreed)
+            else:
+                self.compared += 1
+                self.agreed += int(agreed)
+        logger.info(
+            "doc classifier%s: rules=%s (%.2f) llm=%s %s",
+            " audit" if audit else "", rule.label, rule.confidence, llm_label, "agree" if agreed else "disagree",
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "rule_only": self.rule_only,
+                "compared": self.compared,
+                "agreed": self.agreed,
+                "agreement_rate": (self.agreed / self.compared) if self.compared else 0.0,
+                "audited": self.audited,
+                "audit_agreement_rate": (self.audit_agreed / self.audited) if self.audited else 0.0,
+            }
+
+
+agreement = AgreementStats()
@@ -1,14 +1,204 @@
 from __future__ import annotations
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from typing import Dict, List, Optional
+
+import numpy as np
 from openai import AsyncOpenAI
-from app.core.config import MODEL_NAME, OPENAI_API_KEY
+from app.core.config import (
+    MODEL_NAME,
+    OPENAI_API_KEY,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_CACHE_MAX_BYTES,
+    EMBEDDING_CONCURRENCY,
+)
+from app.utils.cache import LRUCache
+from app.utils.tokens import get_encoder
+
 _client: AsyncOpenAI | None = None
 
+# OpenAI embeddings limits: inputs per request, tokens per request, tokens per input.
+_MAX_BATCH_ITEMS = 2048
+_MAX_BATCH_TOKENS = 300000
+_MAX_INPUT_TOKENS = 8191
+
 def _get_client() -> AsyncOpenAI:
     global _client
     if _client is None:
         _client = AsyncOpenAI(api_key=OPENAI_API_KEY)
     return _client
 
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text or "")).strip()
+
+def _cache_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, hash TEXT NOT NULL, dim INTEGER NOT NULL, vector BLOB NOT NULL, "
+                "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY (model, hash))"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, model: str, keys: List[str]) -> Dict[str, bytes]:
+        found: Dict[str, bytes] = {}
+        with self._lock:
+            conn = self._connect()
+            for start in range(0, len(keys), 500):
+                part = keys[start:start + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                    (model, *part),
+                ).fetchall()
+                found.update({row[0]: row[1] for row in rows})
+        return found
+
+    def put_many(self, model: str, items: Dict[str, bytes]) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, hash, dim, vector) VALUES (?, ?, ?, ?)",
+                [(model, key, len(vector) // 4, vector) for key, vector in items.items()],
+            )
+            conn.commit()
+
+
+_memory = LRUCache(max_bytes=EMBEDDING_CACHE_MAX_BYTES, sizeof=len)
+_disk = EmbeddingStore(EMBEDDING_CACHE_PATH)
+_disk_hits = 0
+
+def _pack(vector: list[float]) -> bytes:
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+def _unpack(blob: bytes) -> list[float]:
+    return np.frombuffer(blob, dtype=np.float32).tolist()
+
+async def _cached_many(keys: List[str]) -> Dict[str, bytes]:
+    global _disk_hits
+    found: Dict[str, bytes] = {}
+    missing: List[str] = []
+    for key in keys:
+        blob = _memory.get((MODEL_NAME, key))
+        if blob is not None:
+            found[key] = blob
+        else:
+            missing.append(key)
+    if missing:
+        try:
+            on_disk = await asyncio.to_thread(_disk.get_many, MODEL_NAME, missing)
+        except sqlite3.Error:
+            on_disk = {}
+        _disk_hits += len(on_disk)
+        for key, blob in on_disk.items():
+            _memory.set((MODEL_NAME, key), blob)
+        found.update(on_disk)
+    return found
+
+async def _store_many(items: Dict[str, bytes]) -> None:
+    for key, blob in items.items():
+        _memory.set((MODEL_NAME, key), blob)
+    try:
+        await asyncio.to_thread(_disk.put_many, MODEL_NAME, items)
+    except sqlite3.Error:
+        pass
+
+def cache_stats() -> Dict[str, float]:
+    memory = _memory.stats()
+    misses = memory["misses"] - _disk_hits
+    lookups = memory["hits"] + memory["misses"]
+    return {
+        "memory_hits": memory["hits"],
+        "disk_hits": _disk_hits,
+        "misses": misses,
+        "hit_rate": ((memory["hits"] + _disk_hits) / lookups) if lookups else 0.0,
+        "memory_entries": memory["entries"],
+        "memory_bytes": memory["bytes"],
+    }
+
+def _pack_requests(token_counts: List[int], max_items: int) -> List[List[int]]:
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for idx, count in enumerate(token_counts):
+        if current and (len(current) >= max_items or current_tokens + count > _MAX_BATCH_TOKENS):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(idx)
+        current_tokens += count
+    if current:
+        batches.append(current)
+    return batches
+
+async def embed_many(
+    texts: List[str],
+    *,
+    batch_size: int = _MAX_BATCH_ITEMS,
+    concurrency: int = EMBEDDING_CONCURRENCY,
+) -> List[List[float]]:
+    normalized = [normalize_text(t) or t for t in texts]
+    keys = [_cache_key(t) for t in normalized]
+    found = await _cached_many(list(dict.fromkeys(keys)))
+
+    pending: Dict[str, str] = {}
+    for key, text in zip(keys, normalized):
+        if key not in found and key not in pending:
+            pending[key] = text
+
+    if pending:
+        encoder = get_encoder(MODEL_NAME)
+        pending_keys = list(pending)
+        token_lists = await asyncio.to_thread(
+            encoder.encode_batch, [pending[k] for k in pending_keys], disallowed_special=()
+        )
+        inputs: List[str] = []
+        counts: List[int] = []
+        for key, tokens in zip(pending_keys, token_lists):
+            if len(tokens) > _MAX_INPUT_TOKENS:
+                tokens = tokens[:_MAX_INPUT_TOKENS]
+                inputs.append(encoder.decode(tokens))
+            else:
+                inputs.append(pending[key])
+            counts.append(len(tokens))
+
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        client = _get_client()
+
+        async def _request(batch: List[int]) -> Dict[str, bytes]:
+            async with semaphore:
+                res = await client.embeddings.create(model=MODEL_NAME, input=[inputs[i] for i in batch])
+            ordered = sorted(res.data, key=lambda d: d.index)
+            return {pending_keys[i]: _pack(d.embedding) for i, d in zip(batch, ordered)}
+
+        max_items = max(1, min(batch_size, _MAX_BATCH_ITEMS))
+        fresh: Dict[str, bytes] = {}
+        for part in await asyncio.gather(*(_request(b) for b in _pack_requests(counts, max_items))):
+            fresh.update(part)
+        await _store_many(fresh)
+        found.update(fresh)
+
+    return [_unpack(found[key]) for key in keys]
+
 async def embed(text: str) -> list[float]:
-    emb = await _get_client().embeddings.create(model=MODEL_NAME, input=text)
-    return emb.data[0].embedding
\ No newline at end of file
+    vectors = await embed_many([text])
+    return vectors[0]
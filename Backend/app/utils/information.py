@@ -3,6 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.model.model import User, NidInfo, TinInfo, SalaryInfo, BankInfo, InsuranceInfo, DpsInfo, SanchaypatraInfo, LoanInfo
 import datetime
 from app.services.summary import DocType, SCHEMAS
+from app.services.tax_context import tax_context_cache
 
 async def persist_structured_info(
     db: AsyncSession,
@@ -54,5 +55,8 @@ async def persist_structured_info(
             user.tin = data.get("tin_number")
     db.add(info)
     await db.commit()
+    tax_context_cache.bump_session(session_id)
+    if user and doc_type in (DocType.NID, DocType.TIN):
+        tax_context_cache.bump_user(user_id)
     await db.refresh(info)
     return info
\ No newline at end of file
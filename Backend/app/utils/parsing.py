@@ -1,9 +1,13 @@
 from __future__ import annotations
 import asyncio
 import base64
-from io import BytesIO
+import logging
+import time
 from openai import AsyncOpenAI
-from app.core.config import OPENAI_API_KEY, GPT_MODEL
+from app.core.config import OPENAI_API_KEY, GPT_MODEL, OCR_CONCURRENCY, OCR_MAX_PAGES, PDF_TIMEOUT
+from app.services import images, pdf
+
+logger = logging.getLogger(__name__)
 
 _client: AsyncOpenAI | None = None
 
@@ -25,28 +29,9 @@ def _is_image(filename: str | None, mime_type: str | None) -> bool:
     mime = (mime_type or "").lower()
     return mime.startswith("image/") or name.endswith((".png", ".jpg", ".jpeg"))
 
-def _extract_pdf_text(content: bytes) -> str:
-    try:
-        import PyPDF2
-
-        reader = PyPDF2.PdfReader(BytesIO(content))
-        return "\n".join((page.extract_text() or "") for page in reader.pages).strip()
-    except Exception:
-        return ""
-
-async def extract_text(*, filename: str | None, mime_type: str | None, content: bytes) -> str:
-    if _is_pdf(filename, mime_type):
-        return await asyncio.to_thread(_extract_pdf_text, content)
-
-    if not _is_image(filename, mime_type):
-        return ""
-
-    client = _get_client()
-    if client is None:
-        return ""
-
-    mime = (mime_type or "image/png").lower()
-    data_url = f"data:{mime};base64,{base64.b64encode(content).decode('ascii')}"
+async def _ocr_image(client: AsyncOpenAI, content: bytes, mime_type: str) -> str:
+    image = await images.prepare_for_ocr(content, mime_type)
+    data_url = f"data:{image.mime_type};base64,{base64.b64encode(image.content).decode('ascii')}"
 
     system = (
         "You are an OCR engine for tax documents. "
@@ -73,4 +58,44 @@ async def extract_text(*, filename: str | None, mime_type: str | None, content:
         )
         return (res.choices[0].message.content or "").strip()
     except Exception:
-        return ""
\ No newline at end of file
+        return ""
+
+async def _ocr_scanned_pages(client: AsyncOpenAI, content: bytes, pages: list[str], timeout: float) -> list[str]:
+    blank = [number for number, text in enumerate(pages) if not text.strip()][:OCR_MAX_PAGES]
+    scans = await pdf.page_images(content, blank, timeout=timeout)
+    semaphore = asyncio.Semaphore(max(1, OCR_CONCURRENCY))
+
+    async def _ocr_page(number: int, image: tuple[bytes, str]) -> tuple[int, str]:
+        async with semaphore:
+            return number, await _ocr_image(client, *image)
+
+    pages = list(pages)
+    for number, text in await asyncio.gather(*(_ocr_page(n, image) for n, image in scans.items())):
+        pages[number] = text
+    return pages
+
+async def extract_text(*, filename: str | None, mime_type: str | None, content: bytes) -> str:
+    if _is_pdf(filename, mime_type):
+        # Text extraction and image extraction share one PDF_TIMEOUT budget.
+        deadline = time.monotonic() + PDF_TIMEOUT
+        try:
+            pages = await pdf.extract_pages(content, timeout=PDF_TIMEOUT)
+        except Exception:
+            return ""
+        client = _get_client()
+        remaining = deadline - time.monotonic()
+        if client is not None and remaining > 0 and any(not text.strip() for text in pages):
+            try:
+                pages = await _ocr_scanned_pages(client, content, pages, remaining)
+            except Exception:
+                logger.exception("OCR of scanned PDF pages failed; keeping the text layer")
+        return "\n".join(pages).strip()
+
+    if not _is_image(filename, mime_type):
+        return ""
+
+    client = _get_client()
+    if client is None:
+        return ""
+
+    return await _ocr_image(client, content, (mime_type or "image/png").lower())
@@ -0,0 +1,55 @@
+from __future__ import annotations
+from typing import Dict, Iterable, List, Optional
+
+from app.utils.tokens import count_tokens
+
+# Chat formatting adds a few tokens per message on top of its content.
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class TokenBudget:
+    def __init__(self, limit: int, *, model: Optional[str] = None, fallback: str = "o200k_base"):
+        self.limit = limit
+        self.model = model
+        self.fallback = fallback
+        self.used = 0
+        self.usage: Dict[str, int] = {}
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.limit - self.used)
+
+    def count(self, text: str) -> int:
+        return count_tokens(text, self.model, self.fallback)
+
+    def _charge(self, section: str, tokens: int) -> None:
+        self.used += tokens
+        self.usage[section] = self.usage.get(section, 0) + tokens
+
+    def reserve(self, section: str, text: str, *, overhead: int = 0) -> int:
+        tokens = self.count(text) + overhead
+        self._charge(section, tokens)
+        return tokens
+
+    def fill(
+        self,
+        section: str,
+        texts: Iterable[str],
+        *,
+        overhead: int = 0,
+        contiguous: bool = False,
+    ) -> List[int]:
+        taken: List[int] = []
+        for idx, text in enumerate(texts):
+            tokens = self.count(text) + overhead
+            if tokens > self.remaining:
+                if contiguous:
+                    break
+                continue
+            self._charge(section, tokens)
+            taken.append(idx)
+        self.usage.setdefault(section, 0)
+        return taken
+
+    def report(self) -> Dict[str, int]:
+        return {**self.usage, "total": self.used, "budget": self.limit}
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.core.config import TAX_DEFAULT_FY
+from app.utils import tax_policy
+from app.utils.tax_calculate import (
+    ALLOWED_TAXPAYER_CATEGORIES,
+    _coerce_taxpayer_category,
+    _get_exemption,
+    _normalize_tax_fy,
+    safe_float,
+    safe_str,
+)
+
+# Mirrors the scalar chain in build_tax_return_context; keep the two in step.
+
+_CATEGORIES = sorted(ALLOWED_TAXPAYER_CATEGORIES)
+
+_SURCHARGE_BANDS = (
+    (500000000.0, 0.35),
+    (200000000.0, 0.30),
+    (100000000.0, 0.20),
+    (40000000.0, 0.10),
+)
+
+
+def _array(value: Any, dtype) -> np.ndarray:
+    arr = np.asarray(value)
+    if arr.dtype.kind in "OUS":
+        # Mixed input (None, blanks, numeric strings) goes through the scalar coercions.
+        coerce = safe_float if dtype is np.float64 else bool
+        return np.array([coerce(v) for v in arr.ravel()], dtype=dtype).reshape(arr.shape)
+    return arr.astype(dtype, copy=False)
+
+
+def _column(value: Any, n: int, dtype, default) -> np.ndarray:
+    if value is None:
+        return np.full(n, default, dtype=dtype)
+    arr = _array(value, dtype)
+    return np.broadcast_to(arr, (n,)) if arr.ndim == 0 else arr
+
+
+def _codes(values: Any, n: int, normalize, choices, default: str) -> np.ndarray:
+    if values is None or isinstance(values, str):
+        values = [values] * n
+    # None and blanks mean "not given", as in the scalar path; str() would turn None into "None".
+    labels = np.array([safe_str(v) or "" for v in np.asarray(values, dtype=object).ravel()], dtype=str)
+    uniques, inverse = np.unique(labels, return_inverse=True)
+    mapped = np.array([choices.index((normalize(u) if u else None) or default) for u in uniques], dtype=np.int8)
+    return mapped[inverse.reshape(-1)]
+
+
+def _gross_tax(taxable: np.ndarray, fy_codes: np.ndarray, policies: List[tax_policy.TaxPolicy]) -> np.ndarray:
+    gross = np.zeros_like(taxable)
+    for code, policy in enumerate(policies):
+        rows = fy_codes == code
+        if not rows.any():
+            continue
+        bounds = np.array(policy.bounds)
+        income = taxable[rows]
+        slab = np.clip(np.searchsorted(bounds, income, side="right") - 1, 0, len(bounds) - 1)
+        gross[rows] = np.where(
+            income > 0,
+            np.array(policy.base_tax)[slab] + (income - bounds[slab]) * np.array(policy.rates)[slab],
+            0.0,
+        )
+    return gross
+
+
+def compute_tax_batch(
+    *,
+    employment_income: Any,
+    bank_interest: Any = None,
+    inv_life: Any = None,
+    inv_dps: Any = None,
+    inv_sanchay: Any = None,
+    taxpayer_category: Any = None,
+    tax_fy: Any = None,
+    war_wounded_ff: Any = None,
+    third_gender: Any = None,
+    parent_of_disabled: Any = None,
+    nri_non_citizen: Any = None,
+    is_new_taxpayer: Any = None,
+    net_wealth: Any = None,
+    more_than_one_motor_car: Any = None,
+    house_area_sqft: Any = None,
+    environmental_surcharge: Any = None,
+) -> Dict[str, np.ndarray]:
+    employment = np.atleast_1d(_array(employment_income, np.float64))
+    n = employment.shape[0]
+
+    interest = _column(bank_interest, n, np.float64, 0.0)
+    investment = (
+        _column(inv_life, n, np.float64, 0.0)
+        + _column(inv_dps, n, np.float64, 0.0)
+        + _column(inv_sanchay, n, np.float64, 0.0)
+    )
+    categories = _codes(taxpayer_category, n, _coerce_taxpayer_category, _CATEGORIES, "general")
+    policy_keys = tax_policy.available_years()
+    policies = [tax_policy.get_policy(key) for key in policy_keys]
+    fy_codes = _codes(tax_fy, n, _normalize_tax_fy, policy_keys, TAX_DEFAULT_FY)
+
+    war_wounded = _column(war_wounded_ff, n, bool, False)
+    third = _column(third_gender, n, bool, False)
+    parent = _column(parent_of_disabled, n, bool, False)
+
+    employment_exempt = np.where(employment > 0, np.minimum(employment / 3.0, 500000.0), 0.0)
+    employment_taxable = np.maximum(0.0, employment - employment_exempt)
+    total_income = employment_taxable + interest
+
+    base_table = np.array([
+        [_get_exemption(policy_key=key, category=category) for category in _CATEGORIES]
+        for key in policy_keys
+    ])
+    base_exemption = base_table[fy_codes, categories]
+
+    exemption = base_exemption
+    for flags, special in (
+        (war_wounded, [p.war_wounded_ff_exemption for p in policies]),
+        (third, [p.third_gender_exemption for p in policies]),
+    ):
+        special = np.array([v if v is not None else 0.0 for v in special])[fy_codes]
+        exemption = np.where(flags, np.maximum(exemption, special), exemption)
+    extra = np.array([p.parent_of_disabled_extra for p in policies])[fy_codes]
+    exemption = np.where(parent, exemption + extra, exemption)
+
+    remaining = total_income - exemption
+    taxable_income = np.where(remaining > 0, remaining, 0.0)
+
+    gross_tax = np.where(
+        _column(nri_non_citizen, n, bool, False),
+        taxable_income * 0.30,
+        _gross_tax(taxable_income, fy_codes, policies),
+    )
+
+    rebate_by_income = total_income * 0.03
+    rebate_by_investment = investment * 0.15
+    rebate = np.maximum(0.0, np.minimum(np.minimum(rebate_by_income, rebate_by_investment), 1000000.0))
+    net_tax = np.maximum(0.0, gross_tax - rebate)
+
+    minimum_tax = np.where(
+        total_income <= base_exemption,
+        0.0,
+        np.where(_column(is_new_taxpayer, n, bool, False), 1000.0, 5000.0),
+    )
+    tax_payable = np.maximum(net_tax, minimum_tax)
+
+    wealth = _column(net_wealth, n, np.float64, 0.0)
+    area = _column(house_area_sqft, n, np.float64, 0.0)
+    fallback = np.where(_column(more_than_one_motor_car, n, bool, False) | (area > 8000.0), 0.10, 0.0)
+    surcharge_rate = np.select([wealth > bound for bound, _ in _SURCHARGE_BANDS], [rate for _, rate in _SURCHARGE_BANDS], fallback)
+    surcharge = np.maximum(0.0, tax_payable * surcharge_rate)
+
+    environmental = _column(environmental_surcharge, n, np.float64, 0.0)
+
+    return {
+        "employment_exempt": employment_exempt,
+        "employment_taxable": employment_taxable,
+        "total_income": total_income,
+        "inv_total": investment,
+        "taxable_income": taxable_income,
+        "gross_tax": gross_tax,
+        "tax_rebate": rebate,
+        "rebate_limit_by_income": np.maximum(0.0, rebate_by_income),
+        "rebate_limit_by_investment": np.maximum(0.0, rebate_by_investment),
+        "net_tax": net_tax,
+        "minimum_tax": minimum_tax,
+        "tax_payable": tax_payable,
+        "net_wealth_surcharge": surcharge,
+        "net_wealth_surcharge_rate": surcharge_rate,
+        "environmental_surcharge": environmental,
+        "total_amount_payable": tax_payable + surcharge + environmental,
+    }
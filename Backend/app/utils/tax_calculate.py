@@ -7,21 +7,11 @@ from typing import Any, Dict, List, Optional
 
 from openai import AsyncOpenAI
 
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.config import OPENAI_API_KEY, GPT_MODEL
-from app.model.model import (
-    BankInfo,
-    DpsInfo,
-    InsuranceInfo,
-    LoanInfo,
-    NidInfo,
-    SalaryInfo,
-    SanchaypatraInfo,
-    TinInfo,
-    User,
-)
+from app.core.config import OPENAI_API_KEY, GPT_MODEL, TAX_DEFAULT_FY
+from app.services.tax_snapshot import load_session_snapshot
+from app.utils import tax_policy
 
 
 _openai_client: Optional[AsyncOpenAI] = None
@@ -50,16 +40,7 @@ def _annualize_amount(amount: Any, *, is_monthly: bool) -> float:
 
 
 def _normalize_tax_fy(value: Any) -> str:
-    raw = (safe_str(value) or "").lower().strip()
-    raw = raw.replace("fy", "").replace("financial year", "").strip()
-    raw = raw.replace(" ", "")
-
-    if raw in {"2024/25", "2024-25", "2024_25", "202425"}:
-        return "2024_25"
-    if raw in {"2025/26", "2025-26", "2025_26", "202526"}:
-        return "2025_26"
-
-    return "2024_25"
+    return tax_policy.normalize_fy(safe_str(value))
 
 
 def _coerce_taxpayer_category(value: Any) -> Optional[str]:
@@ -180,7 +161,7 @@ async def _infer_taxpayer_category_with_llm(*, gender_raw: Optional[str], age_ye
     return coerced if coerced in ALLOWED_TAXPAYER_CATEGORIES else None
 
 
-async def infer_taxpayer_category_from_profile(*, nid_gender: Any, dob_value: Any) -> str:
+async def infer_taxpayer_category_from_profile(*, nid_gender: Any, dob_value: Any, allow_llm: bool = True) -> str:
 
     dob = _parse_dob_to_date(dob_value)
     age_years = _compute_age_years(dob)
@@ -193,6 +174,9 @@ async def infer_taxpayer_category_from_profile(*, nid_gender: Any, dob_value: An
     if gender_norm == "male":
         return "general"
 
+    if not allow_llm:
+        return "general"
+
     gender_raw = safe_str(nid_gender)
     llm = await _infer_taxpayer_category_with_llm(gender_raw=gender_raw, age_years=age_years)
     return llm or "general"
@@ -271,57 +255,6 @@ class TaxInputs:
     investment_sanchaypatra: float = 0.0
 
 
-TAX_POLICIES: Dict[str, Dict[str, Any]] = {
-
-    "2024_25": {
-        "exemption": {
-            "general": 350000.0,
-            "women_senior": 400000.0,
-            "disabled": 475000.0,
-        },
-
-        "slabs": [
-            (100000.0, 0.05),
-            (400000.0, 0.10),
-            (500000.0, 0.15),
-            (500000.0, 0.20),
-            (2000000.0, 0.25),
-            (None, 0.30),
-        ],
-    },
-
-    "2025_26": {
-        "exemption": {
-            "general": 375000.0,
-            "women_senior": 425000.0,
-            "disabled": 500000.0,
-        },
-        "slabs": [
-            (300000.0, 0.10),
-            (400000.0, 0.15),
-            (500000.0, 0.20),
-            (2000000.0, 0.25),
-            (None, 0.30),
-        ],
-    },
-}
-
-_SPECIAL_EXEMPTION_WAR_WOUNDED_FF: Dict[str, float] = {
-    "2024_25": 500000.0,
-    "2025_26": 525000.0,
-}
-
-_SPECIAL_EXEMPTION_THIRD_GENDER: Dict[str, float] = {
-    "2024_25": 475000.0,
-    "2025_26": 500000.0,
-}
-
-_PARENT_OF_DISABLED_EXTRA: Dict[str, float] = {
-    "2024_25": 50000.0,
-    "2025_26": 50000.0,
-}
-
-
 def _get_exemption(
     *,
     policy_key: str,
@@ -331,26 +264,19 @@ def _get_exemption(
     parent_of_disabled: bool = False,
 ) -> float:
 
-    key = policy_key if policy_key in TAX_POLICIES else "2024_25"
-    policy = TAX_POLICIES.get(key) or TAX_POLICIES["2024_25"]
-    exemption_map = policy.get("exemption") or {}
+    policy = tax_policy.get_policy(policy_key)
 
-    base = safe_float(exemption_map.get(category) or exemption_map.get("general") or 0.0)
+    base = safe_float(policy.exemption.get(category) or policy.exemption.get("general") or 0.0)
     effective = base
 
-    if war_wounded_ff:
-        special = _SPECIAL_EXEMPTION_WAR_WOUNDED_FF.get(key)
-        if special is not None:
-            effective = max(effective, safe_float(special))
+    if war_wounded_ff and policy.war_wounded_ff_exemption is not None:
+        effective = max(effective, policy.war_wounded_ff_exemption)
 
-    if third_gender:
-        special = _SPECIAL_EXEMPTION_THIRD_GENDER.get(key)
-        if special is not None:
-            effective = max(effective, safe_float(special))
+    if third_gender and policy.third_gender_exemption is not None:
+        effective = max(effective, policy.third_gender_exemption)
 
     if parent_of_disabled:
-        extra = _PARENT_OF_DISABLED_EXTRA.get(key, 0.0)
-        effective += safe_float(extra)
+        effective += policy.parent_of_disabled_extra
 
     return effective
 
@@ -433,24 +359,7 @@ def compute_gross_tax(*, taxable_income: float, policy_key: str, flat_rate: Opti
     if flat_rate is not None:
         return safe_float(taxable_income) * safe_float(flat_rate)
 
-    policy = TAX_POLICIES.get(policy_key) or TAX_POLICIES["2024_25"]
-    slabs = policy.get("slabs") or []
-
-    remaining = safe_float(taxable_income)
-    tax = 0.0
-
-    for amount, rate in slabs:
-        if remaining <= 0:
-            break
-        if amount is None:
-            tax += remaining * safe_float(rate)
-            remaining = 0.0
-            break
-        take = max(0.0, min(remaining, safe_float(amount)))
-        tax += take * safe_float(rate)
-        remaining -= take
-
-    return tax
+    return tax_policy.get_policy(policy_key).gross_tax(safe_float(taxable_income))
 
 
 def compute_tax_rebate(*, total_income: float, eligible_investment: float) -> Dict[str, float]:
@@ -523,12 +432,6 @@ def _coerce_taxpayer_status(value: Any) -> str:
     return "others"
 
 
-async def _get_single(db: AsyncSession, model, *conditions):
-    stmt = select(model).where(*conditions)
-    result = await db.execute(stmt)
-    return result.scalars().first()
-
-
 def _merge_overrides(base: Dict[str, Any], overrides: Optional[Dict[str, Any]]) -> Dict[str, Any]:
     if not overrides:
         return base
@@ -544,17 +447,19 @@ async def build_tax_return_context(
     user_id: int,
     session_id: str,
     overrides: Optional[Dict[str, Any]] = None,
+    allow_llm: bool = True,
 ) -> Dict[str, Any]:
 
-    user = await _get_single(db, User, User.id == user_id)
-    nid = await _get_single(db, NidInfo, NidInfo.user_id == user_id, NidInfo.session_id == session_id)
-    tin = await _get_single(db, TinInfo, TinInfo.user_id == user_id, TinInfo.session_id == session_id)
-    salary = await _get_single(db, SalaryInfo, SalaryInfo.user_id == user_id, SalaryInfo.session_id == session_id)
-    bank = await _get_single(db, BankInfo, BankInfo.user_id == user_id, BankInfo.session_id == session_id)
-    insurance = await _get_single(db, InsuranceInfo, InsuranceInfo.user_id == user_id, InsuranceInfo.session_id == session_id)
-    dps = await _get_single(db, DpsInfo, DpsInfo.user_id == user_id, DpsInfo.session_id == session_id)
-    sanchay = await _get_single(db, SanchaypatraInfo, SanchaypatraInfo.user_id == user_id, SanchaypatraInfo.session_id == session_id)
-    loan = await _get_single(db, LoanInfo, LoanInfo.user_id == user_id, LoanInfo.session_id == session_id)
+    snapshot = await load_session_snapshot(db, user_id, session_id)
+    user = snapshot.user
+    nid = snapshot.nid
+    tin = snapshot.tin
+    salary = snapshot.salary
+    bank = snapshot.bank
+    insurance = snapshot.insurance
+    dps = snapshot.dps
+    sanchay = snapshot.sanchaypatra
+    loan = snapshot.loan
 
     base: Dict[str, Any] = {
         "name": safe_str(getattr(nid, "name", None)) or safe_str(getattr(user, "name", None)),
@@ -589,6 +494,7 @@ async def build_tax_return_context(
         "taxpayer_category": await infer_taxpayer_category_from_profile(
             nid_gender=getattr(nid, "gender", None),
             dob_value=(getattr(user, "date_of_birth", None) or safe_str(getattr(nid, "date_of_birth", None))),
+            allow_llm=allow_llm,
         ),
 
         "residential_status": "resident",
@@ -597,7 +503,7 @@ async def build_tax_return_context(
         "benefit_third_gender": False,
         "benefit_parent_of_disabled": False,
 
-        "tax_fy": "2024_25",
+        "tax_fy": TAX_DEFAULT_FY,
         "is_new_taxpayer": False,
         "nri_non_citizen": False,
         "net_wealth": 0.0,
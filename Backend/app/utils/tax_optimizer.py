@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.utils.tax_batch import compute_tax_batch
+from app.utils.tax_calculate import compute_tax_rebate, safe_float
+
+INSTRUMENTS = ("inv_life", "inv_dps", "inv_sanchay")
+
+# Caps each axis of the allocation grid; a coarser step is used past this.
+MAX_AXIS_POINTS = 41
+
+
+def _extra_for_max_rebate(context: Dict[str, Any]) -> float:
+    # Past this much eligible investment the 15% limit no longer binds.
+    limits = compute_tax_rebate(total_income=safe_float(context.get("total_income")), eligible_investment=0.0)
+    ceiling = min(limits["rebate_limit_by_income"], limits["rebate_limit_absolute"]) / 0.15
+    return max(0.0, ceiling - safe_float(context.get("inv_total")))
+
+
+def _axis(limit: float, step: float) -> np.ndarray:
+    if limit <= 0:
+        return np.zeros(1)
+    step = max(step, limit / (MAX_AXIS_POINTS - 1))
+    points = np.arange(0.0, limit, step)
+    return np.append(points, limit)
+
+
+def _sweep(context: Dict[str, Any], life: np.ndarray, dps: np.ndarray, sanchay: np.ndarray) -> Dict[str, np.ndarray]:
+    return compute_tax_batch(
+        employment_income=safe_float(context.get("sal_total")),
+        bank_interest=safe_float(context.get("bank_interest")),
+        inv_life=safe_float(context.get("inv_life")) + life,
+        inv_dps=safe_float(context.get("inv_dps")) + dps,
+        inv_sanchay=safe_float(context.get("inv_sanchay")) + sanchay,
+        taxpayer_category=context.get("taxpayer_category"),
+        tax_fy=context.get("tax_fy"),
+        war_wounded_ff=bool(context.get("benefit_war_wounded_ff")),
+        third_gender=bool(context.get("benefit_third_gender")),
+        parent_of_disabled=bool(context.get("benefit_parent_of_disabled")),
+        nri_non_citizen=bool(context.get("nri_non_citizen")),
+        is_new_taxpayer=bool(context.get("is_new_taxpayer")),
+        net_wealth=safe_float(context.get("net_wealth")),
+        more_than_one_motor_car=bool(context.get("more_than_one_motor_car")),
+        house_area_sqft=safe_float(context.get("house_area_sqft")),
+        environmental_surcharge=safe_float(context.get("environmental_surcharge")),
+    )
+
+
+def optimize_investments(
+    context: Dict[str, Any],
+    *,
+    step: float,
+    max_extra: Optional[Dict[str, Optional[float]]] = None,
+) -> Dict[str, Any]:
+    default_limit = _extra_for_max_rebate(context)
+    limits = {
+        name: default_limit if (max_extra or {}).get(name) is None else max(0.0, safe_float(max_extra[name]))
+        for name in INSTRUMENTS
+    }
+
+    axes = [_axis(limits[name], step) for name in INSTRUMENTS]
+    grid = [g.ravel() for g in np.meshgrid(*axes, indexing="ij")]
+    extra_total = grid[0] + grid[1] + grid[2]
+
+    result = _sweep(context, *grid)
+    payable = result["total_amount_payable"]
+    baseline = float(payable[0])
+    saved = baseline - payable
+
+    best_saved = saved.max()
+    candidates = np.flatnonzero(saved >= best_saved - 0.005)
+    best = int(candidates[np.argmin(extra_total[candidates])])
+
+    # Every instrument counts the same towards the rebate, so the curve only depends on the total.
+    totals = _axis(float(extra_total.max()), step)
+    zeros = np.zeros_like(totals)
+    curve_saved = baseline - _sweep(context, totals, zeros, zeros)["total_amount_payable"]
+    marginal = np.zeros_like(curve_saved)
+    marginal[1:] = np.diff(curve_saved) / np.diff(totals)
+
+    return {
+        "baseline": {
+            "inv_total": safe_float(context.get("inv_total")),
+            "tax_rebate": float(result["tax_rebate"][0]),
+            "total_amount_payable": baseline,
+        },
+        "limits": limits,
+        "grid_points": int(extra_total.size),
+        "curve": [
+            {
+                "extra_investment": float(total),
+                "tax_saved": float(s),
+                "marginal_benefit": float(m),
+            }
+            for total, s, m in zip(totals, curve_saved, marginal)
+        ],
+        "optimal": {
+            **{name: float(axis[best]) for name, axis in zip(INSTRUMENTS, grid)},
+            "extra_investment": float(extra_total[best]),
+            "tax_rebate": float(result["tax_rebate"][best]),
+            "total_amount_payable": float(payable[best]),
+            "tax_saved": float(saved[best]),
+            "benefit_ratio": float(saved[best] / extra_total[best]) if extra_total[best] > 0 else 0.0,
+        },
+    }
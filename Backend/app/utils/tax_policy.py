@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import glob
+import json
+import logging
+import os
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import TAX_DEFAULT_FY, TAX_POLICY_DIR
+
+logger = logging.getLogger(__name__)
+
+_FY_PATTERN = re.compile(r"^(\d{4})[-/_]?(\d{2}|\d{4})$")
+
+
+class UnknownTaxYear(ValueError):
+    def __init__(self, value: Any, available: List[str]):
+        super().__init__(
+            f"Unsupported tax year {value!r}; available: {', '.join(available) or 'none'}"
+        )
+        self.value = value
+        self.available = available
+
+
+@dataclass(frozen=True)
+class TaxPolicy:
+    key: str
+    version: int
+    exemption: Dict[str, float]
+    war_wounded_ff_exemption: Optional[float]
+    third_gender_exemption: Optional[float]
+    parent_of_disabled_extra: float
+    # Lower bound of each bracket, tax due on everything below it, and its rate.
+    bounds: Tuple[float, ...]
+    base_tax: Tuple[float, ...]
+    rates: Tuple[float, ...]
+
+    def gross_tax(self, taxable_income: float) -> float:
+        if taxable_income <= 0:
+            return 0.0
+        i = bisect_right(self.bounds, taxable_income) - 1
+        return self.base_tax[i] + (taxable_income - self.bounds[i]) * self.rates[i]
+
+
+def _compile(raw: Dict[str, Any], source: str) -> TaxPolicy:
+    slabs = raw.get("slabs") or []
+    if not slabs:
+        raise ValueError(f"{source}: no slabs")
+
+    bounds: List[float] = []
+    base_tax: List[float] = []
+    rates: List[float] = []
+    lower = 0.0
+    tax = 0.0
+    for i, (amount, rate) in enumerate(slabs):
+        bounds.append(lower)
+        base_tax.append(tax)
+        rates.append(float(rate))
+        if amount is None:
+            if i != len(slabs) - 1:
+                raise ValueError(f"{source}: only the last slab may be open-ended")
+            break
+        if float(amount) <= 0:
+            raise ValueError(f"{source}: slab amounts must be positive")
+        lower += float(amount)
+        tax += float(amount) * float(rate)
+    else:
+        # Income above a closed top slab is untaxed, as in the original slab walk.
+        bounds.append(lower)
+        base_tax.append(tax)
+        rates.append(0.0)
+
+    exemption = {k: float(v) for k, v in (raw.get("exemption") or {}).items()}
+    if "general" not in exemption:
+        raise ValueError(f"{source}: missing general exemption")
+
+    special = raw.get("special_exemption") or {}
+    war_wounded = special.get("war_wounded_ff")
+    third_gender = special.get("third_gender")
+    return TaxPolicy(
+        key=raw["fy"],
+        version=int(raw.get("version") or 1),
+        exemption=exemption,
+        war_wounded_ff_exemption=float(war_wounded) if war_wounded is not None else None,
+        third_gender_exemption=float(third_gender) if third_gender is not None else None,
+        parent_of_disabled_extra=float(raw.get("parent_of_disabled_extra") or 0.0),
+        bounds=tuple(bounds),
+        base_tax=tuple(base_tax),
+        rates=tuple(rates),
+    )
+
+
+def load_policies(directory: str = TAX_POLICY_DIR) -> Dict[str, TaxPolicy]:
+    policies: Dict[str, TaxPolicy] = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            policy = _compile(json.load(f), os.path.basename(path))
+        current = policies.get(policy.key)
+        if current is not None and current.version == policy.version:
+            raise ValueError(f"Duplicate tax policy {policy.key} v{policy.version}")
+        if current is None or policy.version > current.version:
+            policies[policy.key] = policy
+    if TAX_DEFAULT_FY not in policies:
+        raise ValueError(f"Default tax year {TAX_DEFAULT_FY} has no policy in {directory}")
+    return policies
+
+
+_registry: Optional[Dict[str, TaxPolicy]] = None
+
+
+def load() -> Dict[str, TaxPolicy]:
+    global _registry
+    _registry = load_policies()
+    logger.info(
+        "Loaded tax policies: %s",
+        ", ".join(f"{p.key} v{p.version}" for p in _registry.values()),
+    )
+    return _registry
+
+
+def _get_registry() -> Dict[str, TaxPolicy]:
+    return _registry if _registry is not None else load()
+
+
+def available_years() -> List[str]:
+    return sorted(_get_registry())
+
+
+def normalize_fy(value: Any) -> str:
+    raw = str(value if value is not None else "").lower().strip()
+    raw = raw.replace("fy", "").replace("financial year", "").strip()
+    raw = raw.replace(" ", "")
+    if not raw:
+        return TAX_DEFAULT_FY
+
+    match = _FY_PATTERN.match(raw)
+    if match:
+        start, end = match.group(1), match.group(2)
+        if (int(start) + 1) % 100 == int(end[-2:]):
+            key = f"{start}_{end[-2:]}"
+            if key in _get_registry():
+                return key
+    raise UnknownTaxYear(value, available_years())
+
+
+def get_policy(key: str) -> TaxPolicy:
+    policy = _get_registry().get(key)
+    if policy is None:
+        raise UnknownTaxYear(key, available_years())
+    return policy
@@ -0,0 +1,21 @@
+from __future__ import annotations
+from functools import lru_cache
+from typing import Optional
+
+
+@lru_cache(maxsize=None)
+def get_encoder(model: Optional[str] = None, fallback: str = "cl100k_base"):
+    import tiktoken
+
+    if model:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            pass
+    return tiktoken.get_encoding(fallback)
+
+
+def count_tokens(text: str, model: Optional[str] = None, fallback: str = "cl100k_base") -> int:
+    if not text:
+        return 0
+    return len(get_encoder(model, fallback).encode(text, disallowed_special=()))
@@ -0,0 +1,17 @@
+import os
+import tempfile
+
+import pytest
+
+# app.core.config reads these at import time; point everything at a throwaway directory.
+_STORAGE = tempfile.mkdtemp(prefix="taxapp-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_STORAGE}/Database.db")
+os.environ.setdefault("STORAGE_DIR", _STORAGE)
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("VECTOR_BACKEND", "local")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
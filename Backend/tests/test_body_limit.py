@@ -0,0 +1,42 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.endpoints.speech import MAX_AUDIO_BYTES
+from app.api.endpoints.upload import MAX_UPLOAD_BYTES
+from app.main import app
+from app.utils.uploads import MULTIPART_OVERHEAD
+
+ROUTES = [
+    ("/upload/", MAX_UPLOAD_BYTES, 400, "File too large. Max 5 MB"),
+    ("/speech/transcribe", MAX_AUDIO_BYTES, 413, "Audio too large"),
+]
+
+
+@pytest.fixture(scope="module")
+def client():
+    # No lifespan: the limit is enforced before any handler or database access.
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("path,max_bytes,status,detail", ROUTES)
+def test_declared_length_over_the_limit_is_rejected(client, path, max_bytes, status, detail):
+    response = client.post(
+        path,
+        content=b"x" * (max_bytes + MULTIPART_OVERHEAD + 1),
+        headers={"content-type": "multipart/form-data; boundary=x"},
+    )
+    assert response.status_code == status
+    assert response.json() == {"detail": detail}
+
+
+@pytest.mark.parametrize("path,max_bytes,status,detail", ROUTES)
+def test_streamed_body_over_the_limit_is_rejected(client, path, max_bytes, status, detail):
+    chunk = b"x" * (256 * 1024)
+    chunks = (max_bytes + MULTIPART_OVERHEAD) // len(chunk) + 2
+    response = client.post(
+        path,
+        content=iter([chunk] * chunks),
+        headers={"content-type": "multipart/form-data; boundary=x"},
+    )
+    assert response.status_code == status
+    assert response.json() == {"detail": detail}
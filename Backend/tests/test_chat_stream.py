@@ -0,0 +1,120 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+
+from app import main
+from app.api.endpoints import chatbot
+from app.model.model import User
+from app.services.db import async_session
+from app.services.session import fetch_history
+from app.utils.security import create_access_token
+
+
+@pytest.fixture
+async def user_id():
+    await main.on_startup()
+    try:
+        async with async_session() as db:
+            user = User(name="tester", email=f"{uuid.uuid4().hex}@example.com", hashed_password="x")
+            db.add(user)
+            await db.commit()
+            yield user.id
+    finally:
+        await main.on_shutdown()
+
+
+async def _stream(user_id: int, *, disconnect_after_tokens: int | None = None) -> list[str]:
+    # Calls the ASGI app directly so the test controls when the client goes away.
+    body = json.dumps({"message": "How is the rebate computed?"}).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/chat/stream",
+        "raw_path": b"/chat/stream",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"authorization", f"Bearer {create_access_token({'sub': str(user_id)})}".encode()),
+        ],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+    events: list[str] = []
+    gone = asyncio.Event()
+    sent_body = False
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await gone.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            events.append(message["body"].decode())
+            tokens = sum(event.startswith("event: token") for event in events)
+            if disconnect_after_tokens is not None and tokens >= disconnect_after_tokens:
+                gone.set()
+
+    await asyncio.wait_for(main.app(scope, receive, send), timeout=10)
+    return events
+
+
+async def _assistant_replies(user_id: int) -> list[str]:
+    async with async_session() as db:
+        return [m["content"] for m in await fetch_history(db, user_id) if m["role"] == "assistant"]
+
+
+@pytest.mark.anyio
+async def test_disconnect_keeps_the_partial_reply(user_id, monkeypatch):
+    async def rag_stream(query, top_k, chat_history=None, conversation_summary=None):
+        yield "The rebate is"
+        yield " fifteen percent"
+        await asyncio.sleep(30)
+        yield " of eligible investment."
+
+    monkeypatch.setattr(chatbot, "rag_stream", rag_stream)
+    events = await _stream(user_id, disconnect_after_tokens=2)
+
+    assert not any(event.startswith("event: done") for event in events)
+    assert await _assistant_replies(user_id) == ["The rebate is fifteen percent"]
+
+
+@pytest.mark.anyio
+async def test_model_error_discards_the_partial_reply(user_id, monkeypatch):
+    async def rag_stream(query, top_k, chat_history=None, conversation_summary=None):
+        yield "The rebate is"
+        raise RuntimeError("model down")
+
+    monkeypatch.setattr(chatbot, "rag_stream", rag_stream)
+    events = await _stream(user_id)
+
+    assert events[-1].startswith("event: error")
+    assert await _assistant_replies(user_id) == []
+
+
+@pytest.mark.anyio
+async def test_completed_reply_is_persisted(user_id, monkeypatch):
+    async def rag_stream(query, top_k, chat_history=None, conversation_summary=None):
+        yield "Fifteen percent"
+        yield " of eligible investment."
+
+    monkeypatch.setattr(chatbot, "rag_stream", rag_stream)
+    monkeypatch.setattr(chatbot, "compact_session", _no_compaction)
+    events = await _stream(user_id)
+
+    assert events[-1].startswith("event: done")
+    assert await _assistant_replies(user_id) == ["Fifteen percent of eligible investment."]
+
+
+async def _no_compaction(session_id: str) -> None:
+    return None
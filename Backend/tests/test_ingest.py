@@ -0,0 +1,72 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import ingest
+from app.services.vectorstore import get_vector_store
+
+
+def _words(texts, disallowed_special=()):
+    return [text.split() for text in texts]
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    # tiktoken downloads its encodings; a whitespace tokenizer keeps the tests offline.
+    monkeypatch.setattr("app.utils.chunker.get_encoder", lambda *a, **k: SimpleNamespace(encode_batch=_words))
+    monkeypatch.setattr(ingest, "INGEST_MANIFEST_PATH", str(tmp_path / "manifest.json"))
+    monkeypatch.setattr(ingest, "EMBED_BATCH_SIZE", 4)
+    calls = {"n": 0, "fail_from": None}
+
+    async def embed_many(texts, batch_size=128, concurrency=1):
+        calls["n"] += 1
+        if calls["fail_from"] is not None and calls["n"] >= calls["fail_from"]:
+            raise RuntimeError("embedding service down")
+        return [[1.0, float(len(text) % 7), 0.5] for text in texts]
+
+    monkeypatch.setattr(ingest, "embed_many", embed_many)
+    path = tmp_path / f"{tmp_path.name}.txt"
+
+    def write(word: str) -> str:
+        path.write_text("\n\n".join(f"{word} paragraph {i} on rebate rules {i * i}." for i in range(600)))
+        return str(path)
+
+    def manifest() -> dict:
+        return json.loads((tmp_path / "manifest.json").read_text())
+
+    return SimpleNamespace(calls=calls, write=write, manifest=manifest, source=path.name)
+
+
+@pytest.mark.anyio
+async def test_failed_ingest_keeps_previous_chunks_and_manifest(pipeline):
+    await ingest.ingest_file(pipeline.write("First"))
+    before = pipeline.manifest()
+    chunks = before[pipeline.source]["chunks"]
+    assert chunks
+
+    pipeline.calls.update(n=0, fail_from=2)
+    running = asyncio.all_tasks()
+    with pytest.raises(RuntimeError, match="embedding service down"):
+        await ingest.ingest_file(pipeline.write("Second"))
+
+    assert pipeline.manifest() == before
+    assert all(doc_id in get_vector_store()._rows for doc_id in chunks)
+    assert asyncio.all_tasks() <= running
+
+    pipeline.calls.update(n=0, fail_from=None)
+    await ingest.ingest_file(pipeline.write("Second"))
+    retried = pipeline.manifest()[pipeline.source]["chunks"]
+    assert not set(retried) & set(chunks)
+    assert not any(doc_id in get_vector_store()._rows for doc_id in chunks)
+
+
+@pytest.mark.anyio
+async def test_upsert_failure_stops_the_pipeline(pipeline, monkeypatch):
+    async def upsert_many(items):
+        raise RuntimeError("vector store down")
+
+    monkeypatch.setattr(ingest, "upsert_many", upsert_many)
+    with pytest.raises(RuntimeError, match="vector store down"):
+        await asyncio.wait_for(ingest.ingest_file(pipeline.write("Third")), timeout=10)
@@ -0,0 +1,50 @@
+import asyncio
+import io
+
+import PyPDF2
+import pytest
+
+from app.services import pdf
+
+
+def _blank_pdf(pages: int) -> bytes:
+    writer = PyPDF2.PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=612, height=792)
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _pool():
+    yield
+    pdf.shutdown()
+
+
+@pytest.mark.anyio
+async def test_page_cap_is_reported():
+    got = []
+    with pytest.raises(pdf.IncompleteExtraction) as excinfo:
+        async for text in pdf.iter_pages(_blank_pdf(20), max_pages=5):
+            got.append(text)
+    assert len(got) == 5
+    assert excinfo.value.pages == 5
+
+
+@pytest.mark.anyio
+async def test_extract_pages_returns_the_pages_it_got():
+    assert len(await pdf.extract_pages(_blank_pdf(20), max_pages=5)) == 5
+
+
+@pytest.mark.anyio
+async def test_slow_consumer_does_not_spend_the_timeout():
+    data = _blank_pdf(20)
+    # Start the workers first so process startup is not part of the measurement.
+    assert len([t async for t in pdf.iter_pages(data, max_pages=None, timeout=None)]) == 20
+
+    got = []
+    async for text in pdf.iter_pages(data, max_pages=None, timeout=1.0):
+        got.append(text)
+        await asyncio.sleep(0.1)
+    assert len(got) == 20
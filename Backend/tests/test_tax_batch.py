@@ -0,0 +1,132 @@
+import random
+
+import numpy as np
+import pytest
+
+from app.utils import tax_policy
+from app.utils.tax_batch import compute_tax_batch
+from app.utils.tax_calculate import (
+    _coerce_taxpayer_category,
+    _normalize_tax_fy,
+    compute_employment_exemption,
+    compute_gross_tax,
+    compute_minimum_tax,
+    compute_net_wealth_surcharge,
+    compute_tax_rebate,
+    compute_taxable_income,
+    safe_float,
+)
+
+AMOUNTS = {
+    "employment_income": (0, 6_000_000),
+    "bank_interest": (0, 400_000),
+    "inv_life": (0, 300_000),
+    "inv_dps": (0, 200_000),
+    "inv_sanchay": (0, 900_000),
+    "net_wealth": (0, 600_000_000),
+    "house_area_sqft": (0, 12_000),
+    "environmental_surcharge": (0, 50_000),
+}
+FLAGS = (
+    "war_wounded_ff",
+    "third_gender",
+    "parent_of_disabled",
+    "nri_non_citizen",
+    "is_new_taxpayer",
+    "more_than_one_motor_car",
+)
+CATEGORIES = ("general", "women_senior", "female", "disabled", "gazetted_ff", "nonsense")
+BLANKS = (None, "", "  ")
+
+
+def _scalar(row):
+    # The same chain build_tax_return_context runs, one taxpayer at a time.
+    employment = safe_float(row["employment_income"])
+    employment_taxable = max(0.0, employment - compute_employment_exemption(employment))
+    total_income = employment_taxable + safe_float(row["bank_interest"])
+    category = _coerce_taxpayer_category(row["taxpayer_category"]) or "general"
+    policy_key = _normalize_tax_fy(row["tax_fy"])
+    investment = sum(safe_float(row[k]) for k in ("inv_life", "inv_dps", "inv_sanchay"))
+    taxable = compute_taxable_income(
+        total_income=total_income,
+        policy_key=policy_key,
+        category=category,
+        war_wounded_ff=bool(row["war_wounded_ff"]),
+        third_gender=bool(row["third_gender"]),
+        parent_of_disabled=bool(row["parent_of_disabled"]),
+    )
+    gross = compute_gross_tax(
+        taxable_income=taxable,
+        policy_key=policy_key,
+        flat_rate=0.30 if bool(row["nri_non_citizen"]) else None,
+    )
+    rebate = compute_tax_rebate(total_income=total_income, eligible_investment=investment)["rebate"]
+    minimum = compute_minimum_tax(
+        total_income=total_income,
+        policy_key=policy_key,
+        category=category,
+        is_new_taxpayer=bool(row["is_new_taxpayer"]),
+    )
+    payable = max(max(0.0, gross - rebate), minimum)
+    surcharge = compute_net_wealth_surcharge(
+        tax_payable=payable,
+        net_wealth=row["net_wealth"],
+        more_than_one_motor_car=bool(row["more_than_one_motor_car"]),
+        house_area_sqft=row["house_area_sqft"],
+    )["net_wealth_surcharge"]
+    return {
+        "taxable_income": taxable,
+        "gross_tax": gross,
+        "tax_rebate": rebate,
+        "minimum_tax": minimum,
+        "tax_payable": payable,
+        "total_amount_payable": payable + surcharge + safe_float(row["environmental_surcharge"]),
+    }
+
+
+def _rows(count, seed):
+    rng = random.Random(seed)
+    years = tax_policy.available_years()
+    rows = []
+    for _ in range(count):
+        row = {}
+        for name, (low, high) in AMOUNTS.items():
+            pick = rng.random()
+            if pick < 0.15:
+                row[name] = rng.choice(BLANKS)
+            elif pick < 0.25:
+                row[name] = str(round(rng.uniform(low, high), 2))
+            else:
+                row[name] = round(rng.uniform(low, high), 2)
+        for name in FLAGS:
+            row[name] = rng.choice((True, False, False, None, "", 1, 0))
+        row["taxpayer_category"] = rng.choice(CATEGORIES + BLANKS)
+        row["tax_fy"] = rng.choice(tuple(years) + tuple(y.replace("_", "-") for y in years) + BLANKS)
+        rows.append(row)
+    return rows
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_matches_scalar_chain(seed):
+    rows = _rows(200, seed)
+    columns = {name: [row[name] for row in rows] for name in rows[0]}
+    batch = compute_tax_batch(**columns)
+    for i, row in enumerate(rows):
+        expected = _scalar(row)
+        for key, value in expected.items():
+            assert batch[key][i] == pytest.approx(value, abs=1e-6), (key, row)
+
+
+@pytest.mark.parametrize("blank", BLANKS)
+def test_blank_columns_fall_back_to_defaults(blank):
+    names = list(AMOUNTS) + list(FLAGS) + ["taxpayer_category", "tax_fy"]
+    explicit = compute_tax_batch(employment_income=[1_500_000.0])
+    for name in names:
+        # A whitespace-only flag is truthy for bool(), in the scalar path too.
+        if name == "employment_income" or (name in FLAGS and blank == "  "):
+            continue
+        result = compute_tax_batch(employment_income=[1_500_000.0], **{name: [blank]})
+        for key in ("total_amount_payable", "taxable_income", "tax_rebate"):
+            np.testing.assert_allclose(result[key], explicit[key], err_msg=name)
+    blank_income = compute_tax_batch(employment_income=[blank])
+    assert blank_income["total_amount_payable"][0] == 0.0
@@ -4,12 +4,16 @@ import React from 'react'
 import { useI18n } from '@/lib/i18n-provider'
 // Removed unused Card imports
 import { Button } from '@/components/ui/button'
-import api from '@/lib/api'
+import api, { uploadAPI } from '@/lib/api'
 import Link from 'next/link'
 import { Modal } from '@/components/ui/modal'
 import { Upload } from 'lucide-react'
 // animations removed to avoid hydration issues
 
+// Background processing normally finishes well within this; past it we stop polling.
+const JOB_POLL_INTERVAL_MS = 1000
+const JOB_POLL_TIMEOUT_MS = 5 * 60 * 1000
+
 interface FileItem {
   id: string
   name: string
@@ -175,7 +179,21 @@ export function FileUploader({
         }
       })
       
-      const docType = (res?.data?.doc_type as string | undefined) || undefined
+      // Processing runs in a background job; poll until it finishes.
+      let job = res?.data
+      const pollDeadline = Date.now() + JOB_POLL_TIMEOUT_MS
+      while (job?.job_id && job.status !== 'done' && job.status !== 'failed') {
+        if (Date.now() > pollDeadline) {
+          throw new Error('Processing is taking longer than expected. Please check back later.')
+        }
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS))
+        job = (await uploadAPI.getJob(job.job_id)).data
+      }
+      if (job?.status === 'failed') {
+        throw new Error(job.error || 'Failed to process upload')
+      }
+
+      const docType = (job?.doc_type as string | undefined) || undefined
 
       // Mark file as successfully uploaded
       setFiles(prev => prev.map(f => 
@@ -197,7 +215,7 @@ export function FileUploader({
       
     } catch (err: any) {
       const code = err?.response?.status
-      const detail = err?.response?.data?.detail || 'Failed to upload'
+      const detail = err?.response?.data?.detail || err?.message || 'Failed to upload'
 
       // Show profile completion popup for 400 errors
       if (code === 400 && typeof detail === 'string' && detail.includes('Complete profile')) {
@@ -205,6 +223,8 @@ export function FileUploader({
         setShowPopup(true)
       } else {
         console.error('Upload failed:', detail)
+        setStatusMessage(`${file.name}: ${typeof detail === 'string' ? detail : 'Failed to upload'}`)
+        setStatusType('error')
       }
 
       // Mark file as failed
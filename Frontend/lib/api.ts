@@ -120,6 +120,7 @@ export const speechAPI = {
 
 export const uploadAPI = {
   getStatus: () => api.get('/upload/status'),
+  getJob: (jobId: string) => api.get(`/upload/jobs/${jobId}`),
 }
 
 export const userAPI = {